@@ -0,0 +1,370 @@
+####################################################################################################
+# Description: Benchmark suite of the CER scoring, the score cache, the file loading and the text normalization.
+# Synthetic datasets are generated for short Latin lines, long Thai paragraphs and highly divergent
+# pairs at any number of rows. Each benchmark reports its best time over a few runs, its throughput
+# (pairs or rows per second, characters per second) and its peak memory. The memory is measured in a forked
+# process as the growth of its peak resident set size, which includes the buffers of pyarrow and the other
+# native libraries. Where fork is not available (Windows), tracemalloc is used instead, which only sees the
+# allocations of Python objects, the report gives the method used.
+# The results are saved as JSON so that two commits can be compared with `--compare`.
+# Usage: python benchmark.py --rows 10000 100000 --output results.json
+# Use --no_memory on large datasets, the memory is measured in an extra run.
+# Then, after a change: python benchmark.py --rows 10000 100000 --output new.json --compare results.json
+####################################################################################################
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+try:
+    from . import cer, normalization
+except ImportError:
+    # Imported as a top-level module by the scripts in this directory
+    import cer
+    import normalization
+
+LATIN_WORDS = ['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'invoice', 'number', 'street', 'total', 'amount', 'date', 'signature', 'page', 'office', 'address']
+THAI_WORDS = ['ถนน', 'ประเทศ', 'ไทย', 'ภาษา', 'เลขที่', 'หมู่บ้าน', 'จังหวัด', 'อำเภอ', 'ตำบล', 'กรุงเทพ', 'น้ำ', 'ข้าว', 'โรงเรียน', 'มหาวิทยาลัย', 'เอกสาร', 'ใบเสร็จ']
+# Rate of character edits between a reference and its hypothesis
+ERROR_RATE = 0.05
+# Excel sheets can not hold more rows than this, larger datasets skip the XLSX loading benchmark
+XLSX_MAX_ROWS = 1048575
+
+def _lines(words: List[str], rows: int, min_words: int, max_words: int, separator: str, rng: np.random.Generator) -> List[str]:
+    lengths = rng.integers(min_words, max_words + 1, size=rows)
+    choices = rng.integers(0, len(words), size=int(lengths.sum()))
+    lines = []
+    start = 0
+    for length in lengths:
+        lines.append(separator.join([words[choice] for choice in choices[start:start + length]]))
+        start += length
+    return lines
+
+def _corrupt(text: str, rate: float, alphabet: str, rng: np.random.Generator) -> str:
+    # Random substitutions, deletions and insertions, about rate edits per character
+    characters = list(text)
+    for _ in range(rng.binomial(len(characters), rate)):
+        position = int(rng.integers(0, len(characters) + 1))
+        operation = rng.integers(0, 3)
+        if operation == 0 and position < len(characters):
+            characters[position] = alphabet[rng.integers(0, len(alphabet))]
+        elif operation == 1 and position < len(characters):
+            del characters[position]
+        else:
+            characters.insert(position, alphabet[rng.integers(0, len(alphabet))])
+    return ''.join(characters)
+
+def _pairs(references: List[str], words: List[str], rng: np.random.Generator) -> Tuple[List[str], List[str]]:
+    alphabet = ''.join(sorted(set(''.join(words))))
+    hypotheses = [_corrupt(reference, ERROR_RATE, alphabet, rng) for reference in references]
+    return hypotheses, references
+
+def latin_lines(rows: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Short Latin lines of 3 to 8 words, the hypotheses differ by about 5% of the characters
+    Args:
+        rows: number of pairs
+        seed: seed of the random generator, the same seed gives the same pairs
+    Returns:
+        hypotheses: list of strings
+        references: list of strings
+    """
+    rng = np.random.default_rng(seed)
+    return _pairs(_lines(LATIN_WORDS, rows, 3, 8, ' ', rng), LATIN_WORDS, rng)
+
+def thai_paragraphs(rows: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Long Thai paragraphs of 40 to 120 words, the hypotheses differ by about 5% of the characters
+    Args:
+        rows: number of pairs
+        seed: seed of the random generator, the same seed gives the same pairs
+    Returns:
+        hypotheses: list of strings
+        references: list of strings
+    """
+    rng = np.random.default_rng(seed)
+    return _pairs(_lines(THAI_WORDS, rows, 40, 120, '', rng), THAI_WORDS, rng)
+
+def divergent_pairs(rows: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Unrelated Latin lines of 3 to 8 words, the edit distance is close to the length of the pair
+    Args:
+        rows: number of pairs
+        seed: seed of the random generator, the same seed gives the same pairs
+    Returns:
+        hypotheses: list of strings
+        references: list of strings
+    """
+    rng = np.random.default_rng(seed)
+    references = _lines(LATIN_WORDS, rows, 3, 8, ' ', rng)
+    hypotheses = _lines(LATIN_WORDS, rows, 3, 8, ' ', rng)
+    return hypotheses, references
+
+# Dataset generators by name, each takes the number of rows and a seed
+DATASETS: Dict[str, Callable[[int, int], Tuple[List[str], List[str]]]] = {
+    'latin_lines': latin_lines,
+    'thai_paragraphs': thai_paragraphs,
+    'divergent_pairs': divergent_pairs,
+}
+
+# How the peak memory is measured, see `peak_memory()`
+MEMORY_METHOD = 'rss' if resource is not None and 'fork' in multiprocessing.get_all_start_methods() else 'tracemalloc'
+
+def _peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _measure_rss(function: Callable[[], Any], connection) -> None:
+    # The peak resident set size of a forked process starts at its current size
+    try:
+        start = _peak_rss()
+        function()
+        connection.send(_peak_rss() - start)
+    except BaseException as error:
+        connection.send(error)
+    finally:
+        connection.close()
+        # The worker processes started by the function would keep the forked process from exiting
+        cer.shutdown_worker_pools()
+
+def peak_memory(function: Callable[[], Any]) -> int:
+    """
+    Measure the peak memory allocated by a function, in a forked process with `MEMORY_METHOD` 'rss'
+    The growth of the peak resident set size does not include the memory the process already held and reused,
+    it counts the memory of all the libraries but not of the worker processes. With 'tracemalloc', only the
+    Python allocations are counted.
+    Args:
+        function: function without arguments
+    Returns:
+        peak: bytes
+    """
+    if MEMORY_METHOD == 'rss':
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_measure_rss, args=(function, sender))
+        process.start()
+        sender.close()
+        try:
+            result = receiver.recv()
+        finally:
+            process.join()
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    # tracemalloc slows the function down, so the memory is measured in a separate run
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def measure(function: Callable[[], Any], repeat: int = 3, memory: bool = True) -> Dict[str, Optional[float]]:
+    """
+    Time a function and measure its peak memory
+    Args:
+        function: function without arguments
+        repeat: number of timed runs, the best one is kept
+        memory: measure the peak memory with `peak_memory()` in an extra run, the peak is None otherwise
+    Returns:
+        measurement: dict with the best time in seconds and the peak memory in bytes
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'seconds': min(timings), 'peak_memory_bytes': peak_memory(function) if memory else None}
+
+def _characters(hypotheses: List[str], references: List[str]) -> int:
+    return sum(map(len, hypotheses)) + sum(map(len, references))
+
+def scoring_benchmarks(dataset: str, hypotheses: List[str], references: List[str], repeat: int, workers: int, memory: bool) -> List[Dict[str, Any]]:
+    results = []
+    for backend in cer.BACKENDS:
+        # jiwer is too slow for large corpora, it is only measured as a reference point on small ones
+        if backend == 'jiwer' and len(references) > 100000:
+            continue
+        measurement = measure(lambda: cer.cer(hypotheses, references, backend=backend, workers=workers), repeat, memory)
+        results.append({'benchmark': 'scoring', 'name': backend, **measurement,
+                        'pairs_per_second': len(references) / measurement['seconds'],
+                        'characters_per_second': _characters(hypotheses, references) / measurement['seconds']})
+    return results
+
+def cache_benchmarks(dataset: str, hypotheses: List[str], references: List[str], repeat: int, workers: int, memory: bool) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        with cer.ScoreCache(directory) as cache:
+            # Rerun of the same pairs, which are all in the cache
+            cer.cer(hypotheses, references, workers=workers, cache=cache)
+            functions = {
+                'no_cache': lambda: cer.cer(hypotheses, references, workers=workers),
+                'warm_cache': lambda: cer.cer(hypotheses, references, workers=workers, cache=cache),
+            }
+            for name, function in functions.items():
+                measurement = measure(function, repeat, memory)
+                results.append({'benchmark': 'cache', 'name': name, **measurement,
+                                'pairs_per_second': len(references) / measurement['seconds']})
+    return results
+
+def normalization_benchmarks(dataset: str, hypotheses: List[str], references: List[str], repeat: int, workers: int, memory: bool) -> List[Dict[str, Any]]:
+    functions = {
+        'normalize': lambda: normalization.normalize(references),
+        'process_text': lambda: [cer.process_text(reference) for reference in references],
+    }
+    results = []
+    for name, function in functions.items():
+        measurement = measure(function, repeat, memory)
+        results.append({'benchmark': 'normalization', 'name': name, **measurement,
+                        'rows_per_second': len(references) / measurement['seconds'],
+                        'characters_per_second': sum(map(len, references)) / measurement['seconds']})
+    return results
+
+def _write(dataframe: pd.DataFrame, file_path: str, extension: str) -> None:
+    if extension in ('.csv', '.csv.gz'):
+        dataframe.to_csv(file_path, index=False)
+    elif extension == '.xlsx':
+        dataframe.to_excel(file_path, index=False)
+    elif extension in ('.jsonl', '.jsonl.gz'):
+        dataframe.to_json(file_path, orient='records', lines=True, force_ascii=False)
+    elif extension == '.parquet':
+        dataframe.to_parquet(file_path)
+    else:
+        dataframe.to_feather(file_path)
+
+def loading_benchmarks(dataset: str, hypotheses: List[str], references: List[str], repeat: int, workers: int, memory: bool) -> List[Dict[str, Any]]:
+    dataframe = pd.DataFrame({'id': np.arange(len(references)), 'prediction': hypotheses, 'groundtruth': references})
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ['.csv', '.csv.gz', '.xlsx', '.parquet', '.arrow', '.jsonl', '.jsonl.gz']:
+            if extension == '.xlsx' and len(dataframe) > XLSX_MAX_ROWS:
+                continue
+            file_path = os.path.join(directory, dataset + extension)
+            try:
+                _write(dataframe, file_path, extension)
+                # Same columns as read by `cer_calculation.py`
+                measurement = measure(lambda: cer.read_file(file_path, ['groundtruth']), repeat, memory)
+            except ImportError as error:
+                print(f"Skipping {extension}: {error}", file=sys.stderr)
+                continue
+            results.append({'benchmark': 'loading', 'name': extension, **measurement,
+                            'rows_per_second': len(dataframe) / measurement['seconds'],
+                            'file_size_bytes': os.path.getsize(file_path)})
+    return results
+
+# Benchmarks by name, each takes the dataset name, its pairs, the number of timed runs and of workers and whether to measure the memory
+BENCHMARKS: Dict[str, Callable[[str, List[str], List[str], int, int, bool], List[Dict[str, Any]]]] = {
+    'scoring': scoring_benchmarks,
+    'cache': cache_benchmarks,
+    'normalization': normalization_benchmarks,
+    'loading': loading_benchmarks,
+}
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(benchmarks: List[str], datasets: List[str], row_counts: List[int], repeat: int = 3, workers: int = 1, seed: int = 0, memory: bool = True) -> Dict[str, Any]:
+    """
+    Run the benchmarks on every dataset at every size
+    Args:
+        benchmarks: list of names in `BENCHMARKS`
+        datasets: list of names in `DATASETS`
+        row_counts: list of numbers of rows
+        repeat: number of timed runs of each benchmark, the best one is kept
+        workers: number of worker processes of the scoring benchmarks, 0 for all CPU cores
+        seed: seed of the dataset generators
+        memory: measure the peak memory, which makes an extra run
+    Returns:
+        report: dict with the commit, the environment and the list of results
+    """
+    results = []
+    for rows in row_counts:
+        for dataset in datasets:
+            hypotheses, references = DATASETS[dataset](rows, seed)
+            for benchmark in benchmarks:
+                for result in BENCHMARKS[benchmark](dataset, hypotheses, references, repeat, workers, memory):
+                    results.append({**result, 'dataset': dataset, 'rows': rows})
+                    peak = '' if result['peak_memory_bytes'] is None else f"{result['peak_memory_bytes'] / 2**20:10.1f} MiB"
+                    print(f"{result['benchmark']:<14} {result['name']:<13} {dataset:<16} {rows:>9} rows {result['seconds']:10.4f} s {peak}", file=sys.stderr)
+    return {
+        'commit': _commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': workers,
+        'memory_method': MEMORY_METHOD if memory else None,
+        'results': results,
+    }
+
+def _result_key(result: Dict[str, Any]) -> Tuple[str, str, str, int]:
+    return result['benchmark'], result['name'], result['dataset'], result['rows']
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Find the benchmarks that got slower between two reports of `run_benchmarks()`
+    Args:
+        baseline: report of the reference commit
+        current: report of the commit to check
+        tolerance: relative slowdown ignored as noise
+    Returns:
+        regressions: list of dicts with the benchmark, name, dataset, rows and both times, slowest first
+    """
+    baseline_seconds = {_result_key(result): result['seconds'] for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = _result_key(result)
+        if key in baseline_seconds and result['seconds'] > baseline_seconds[key] * (1 + tolerance):
+            regressions.append({**dict(zip(['benchmark', 'name', 'dataset', 'rows'], key)),
+                                'baseline_seconds': baseline_seconds[key], 'seconds': result['seconds'],
+                                'slowdown': result['seconds'] / baseline_seconds[key]})
+    return sorted(regressions, key=lambda regression: regression['slowdown'], reverse=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the CER scoring, file loading and text normalization')
+    parser.add_argument('--benchmarks', type=str, nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS), help='Benchmarks to run')
+    parser.add_argument('--datasets', type=str, nargs='+', default=list(DATASETS), choices=list(DATASETS), help='Synthetic datasets to run the benchmarks on')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='Numbers of rows of the datasets, e.g. 10000 100000 1000000 10000000')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each benchmark, the best one is kept')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes of the scoring benchmarks, 0 for all CPU cores')
+    parser.add_argument('--no_memory', action='store_true', help='Skip the peak memory measurement, which is slow on large datasets')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the dataset generators')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Path to the JSON results')
+    parser.add_argument('--compare', type=str, default=None, help='Path to the JSON results of a previous run, slower benchmarks are reported')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Relative slowdown ignored as noise by --compare')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.benchmarks, args.datasets, args.rows, args.repeat, args.workers, args.seed, not args.no_memory)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), report, args.tolerance)
+        for regression in regressions:
+            print(f"Slower: {regression['benchmark']} {regression['name']} {regression['dataset']} {regression['rows']} rows: {regression['baseline_seconds']:.4f} s -> {regression['seconds']:.4f} s ({regression['slowdown']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regression")
@@ -0,0 +1,111 @@
+####################################################################################################
+# Description: Bootstrap confidence intervals and paired significance tests of the CER.
+# The pairs are scored once with `cer.row_errors()`, the resampling then only sums the per-row edit
+# counts and reference lengths with NumPy. Identical rows are grouped and resampled together with a
+# multinomial draw, so thousands of samples of millions of rows take seconds.
+# The paired bootstrap compares two systems scored against the same groundtruth on the same
+# resampled rows, its p-value is the probability that the sign of the CER difference is reversed.
+####################################################################################################
+
+from typing import List, NamedTuple, Optional
+import numpy as np
+
+# Number of multinomial counts drawn at once, bounds the memory used by the resampling
+BLOCK_SIZE = 1 << 22
+
+class BootstrapResult(NamedTuple):
+    """
+    CER and its bootstrap confidence interval
+    """
+    cer: float
+    low: float
+    high: float
+
+class PairedBootstrapResult(NamedTuple):
+    """
+    CER of two systems, the confidence interval of their difference (b - a) and its p-value
+    """
+    cer_a: float
+    cer_b: float
+    difference: float
+    low: float
+    high: float
+    p_value: float
+
+def _valid_rows(reference_length: np.ndarray, *errors: np.ndarray) -> List[np.ndarray]:
+    # Pairs with an empty reference are ignored, as in `cer.cer()`
+    reference_length = np.asarray(reference_length, dtype=np.int64)
+    if any(len(array) != len(reference_length) for array in errors):
+        raise ValueError("Number of errors and reference lengths should be the same")
+    valid = reference_length > 0
+    if not valid.any():
+        raise ValueError("No pair with a non-empty reference")
+    return [np.asarray(array, dtype=np.int64)[valid] for array in errors] + [reference_length[valid]]
+
+def _resampled_sums(arrays: List[np.ndarray], samples: int, seed: Optional[int]) -> List[np.ndarray]:
+    """
+    Sum every array over the same bootstrap samples of its rows
+    Returns:
+        sums: list of arrays of shape (samples,), one per input array
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(arrays[0])
+    # Rows with the same values are interchangeable, so drawing n rows with replacement is the same as
+    # drawing how many times each distinct row is picked from a multinomial distribution,
+    # whose cost depends on the number of distinct rows rather than on the number of rows
+    values, counts = np.unique(np.stack(arrays, axis=1), axis=0, return_counts=True)
+    probabilities = counts / rows
+    sums = np.empty((samples, len(arrays)), dtype=np.int64)
+    samples_per_block = max(1, BLOCK_SIZE // len(values))
+    for start in range(0, samples, samples_per_block):
+        stop = min(samples, start + samples_per_block)
+        sums[start:stop] = rng.multinomial(rows, probabilities, size=stop - start) @ values
+    return list(sums.T)
+
+def _interval(values: np.ndarray, confidence: float) -> np.ndarray:
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence should be between 0 and 1")
+    alpha = (1 - confidence) / 2
+    return np.quantile(values, [alpha, 1 - alpha])
+
+def bootstrap_cer(errors: np.ndarray, reference_length: np.ndarray, samples: int = 1000, confidence: float = 0.95, seed: Optional[int] = None) -> BootstrapResult:
+    """
+    Compute the CER and its percentile bootstrap confidence interval from per-row counts
+    Args:
+        errors: array of the edit distance of every pair, e.g. from `cer.row_errors()`
+        reference_length: array of the reference length of every pair, pairs with an empty reference are ignored
+        samples: number of bootstrap samples
+        confidence: confidence level of the interval
+        seed: optional seed of the resampling
+    Returns:
+        result: BootstrapResult
+    """
+    errors, reference_length = _valid_rows(reference_length, errors)
+    error_sums, length_sums = _resampled_sums([errors, reference_length], samples, seed)
+    low, high = _interval(error_sums / length_sums, confidence)
+    return BootstrapResult(cer=int(errors.sum()) / int(reference_length.sum()), low=float(low), high=float(high))
+
+def paired_bootstrap(errors_a: np.ndarray, errors_b: np.ndarray, reference_length: np.ndarray, samples: int = 1000, confidence: float = 0.95, seed: Optional[int] = None) -> PairedBootstrapResult:
+    """
+    Compare the CER of two systems scored against the same references with a paired bootstrap
+    Args:
+        errors_a: array of the edit distance of every pair of the first system
+        errors_b: array of the edit distance of every pair of the second system, aligned with errors_a
+        reference_length: array of the reference length of every pair, pairs with an empty reference are ignored
+        samples: number of bootstrap samples
+        confidence: confidence level of the interval of the difference
+        seed: optional seed of the resampling
+    Returns:
+        result: PairedBootstrapResult, the difference is cer_b - cer_a
+    """
+    errors_a, errors_b, reference_length = _valid_rows(reference_length, errors_a, errors_b)
+    total_length = int(reference_length.sum())
+    cer_a = int(errors_a.sum()) / total_length
+    cer_b = int(errors_b.sum()) / total_length
+    # Both systems are resampled on the same rows, so only the difference of their errors is needed
+    difference_sums, length_sums = _resampled_sums([errors_b - errors_a, reference_length], samples, seed)
+    differences = difference_sums / length_sums
+    low, high = _interval(differences, confidence)
+    # Two-sided p-value of the null hypothesis that both systems have the same CER
+    p_value = min(1.0, 2 * min(float(np.mean(differences <= 0)), float(np.mean(differences >= 0))))
+    return PairedBootstrapResult(cer_a=cer_a, cer_b=cer_b, difference=cer_b - cer_a, low=float(low), high=float(high), p_value=p_value)
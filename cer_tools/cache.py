@@ -0,0 +1,138 @@
+####################################################################################################
+# Description: Persistent cache of pair scores used by `cer.edit_counts()`.
+# The edit distance of each hypothesis/reference pair is stored in a SQLite database under a
+# user-given directory, keyed by a hash of the processed pair, so that evaluating the same ground
+# truth against successive OCR outputs only computes the distances of the lines that changed.
+# The number of entries is bounded, the least recently used entries are evicted first.
+# The keys are 64-bit integers so that the table is a SQLite rowid table, and each batch of keys is looked
+# up with one join against a temporary table. Pairs shorter than `min_length` characters are not cached,
+# as the edit distance engine scores them faster than they are hashed and looked up.
+####################################################################################################
+
+from typing import Dict, List, Sequence
+import hashlib
+import os
+import sqlite3
+
+# Name of the database file in the cache directory
+DATABASE_NAME = 'cer_cache.sqlite3'
+# Length from which a warm cache returns the distance of a pair with 5% of edits faster than rapidfuzz computes it
+MIN_CACHED_LENGTH = 256
+
+def pair_key(hypothesis: str, reference: str) -> int:
+    """
+    Hash a hypothesis/reference pair into a cache key
+    Args:
+        hypothesis: string
+        reference: string
+    Returns:
+        key: signed 64-bit int
+    """
+    # The length prefix keeps ('ab', 'c') and ('a', 'bc') apart
+    text = f'{len(hypothesis)}:{hypothesis}{reference}'
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+class ScoreCache:
+    """
+    Size-bounded LRU cache of pair edit distances stored in a SQLite database
+    Args:
+        cache_dir: directory of the database, created if missing
+        max_entries: maximum number of pairs kept in the cache
+        min_length: pairs whose hypothesis and reference are both shorter are scored without the cache
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 1000000, min_length: int = MIN_CACHED_LENGTH):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, DATABASE_NAME)
+        self.max_entries = max_entries
+        self.min_length = min_length
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Pairs scored without the cache, as shorter than min_length
+        self.bypassed = 0
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS distances (key INTEGER PRIMARY KEY, errors INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS distances_last_used ON distances (last_used)')
+        self.connection.execute('CREATE TEMP TABLE lookup (key INTEGER PRIMARY KEY)')
+        self.connection.commit()
+        # Logical clock ordering the uses of the entries, persisted with them
+        self.clock, self.entries = self.connection.execute('SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM distances').fetchone()
+
+    def __enter__(self) -> 'ScoreCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the database
+        """
+        self.connection.close()
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def get_many(self, keys: Sequence[int]) -> Dict[int, int]:
+        """
+        Look up the edit distances of many pairs and mark the found ones as recently used
+        Args:
+            keys: list of keys from `pair_key()`
+        Returns:
+            errors: dict mapping the keys found in the cache to their edit distance
+        """
+        self.connection.execute('DELETE FROM lookup')
+        self.connection.executemany('INSERT OR IGNORE INTO lookup (key) VALUES (?)', ((key,) for key in keys))
+        found = dict(self.connection.execute('SELECT key, errors FROM distances JOIN lookup USING (key)').fetchall())
+        if found:
+            self.connection.execute('UPDATE distances SET last_used = ? WHERE key IN (SELECT key FROM lookup)', (self._tick(),))
+        self.connection.commit()
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, keys: Sequence[int], errors: Sequence[int]) -> None:
+        """
+        Store the edit distances of many pairs, evicting the least recently used pairs above max_entries
+        Args:
+            keys: list of keys from `pair_key()`
+            errors: list of edit distances, aligned with keys
+        """
+        now = self._tick()
+        # A pair has a single distance, the keys already stored are left as they are
+        cursor = self.connection.executemany(
+            'INSERT OR IGNORE INTO distances (key, errors, last_used) VALUES (?, ?, ?)',
+            ((key, int(error), now) for key, error in zip(keys, errors)),
+        )
+        self.entries += cursor.rowcount
+        excess = self.entries - self.max_entries
+        if excess > 0:
+            self.connection.execute('DELETE FROM distances WHERE key IN (SELECT key FROM distances ORDER BY last_used, key LIMIT ?)', (excess,))
+            self.entries -= excess
+            self.evictions += excess
+        self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistics of the cache since it was opened
+        Returns:
+            stats: dict with the number of hits, misses, evictions, bypassed pairs and entries
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'bypassed': self.bypassed, 'entries': len(self)}
+
+def keys_for_pairs(hypotheses: Sequence[str], references: Sequence[str]) -> List[int]:
+    """
+    Hash every hypothesis/reference pair with `pair_key()`
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+    Returns:
+        keys: list of ints
+    """
+    return [pair_key(hyp, ref) for hyp, ref in zip(hypotheses, references)]
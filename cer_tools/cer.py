@@ -1,13 +1,318 @@
-from typing import List
+import atexit
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import zip_longest
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import os
 import jiwer
+import numpy as np
 import pandas as pd
 
-def cer(hypotheses: List[str], references: List[str]) -> float:
+try:
+    from . import distance
+    from .cache import ScoreCache, keys_for_pairs
+    from .normalization import DEFAULT_STEPS, normalize
+    from .readers import STREAMING_FORMATS, file_format, read_column_chunks, read_file, read_head
+    from .tokenization import DEFAULT_TOKENIZER, tokenize
+except ImportError:
+    # Imported as a top-level module by the scripts in this directory
+    import distance
+    from cache import ScoreCache, keys_for_pairs
+    from normalization import DEFAULT_STEPS, normalize
+    from readers import STREAMING_FORMATS, file_format, read_column_chunks, read_file, read_head
+    from tokenization import DEFAULT_TOKENIZER, tokenize
+
+def _native_counts(hypotheses: List[str], references: List[str], max_distance: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Count the edits with the batched engine in the `distance` module
+    """
+    # Same preprocessing as the default CER transformation of jiwer
+    hypotheses = [hyp.strip() for hyp in hypotheses]
+    references = [ref.strip() for ref in references]
+    errors = distance.levenshtein_batch(hypotheses, references, max_distance)
+    return int(errors.sum()), sum(len(ref) for ref in references)
+
+def _jiwer_counts(hypotheses: List[str], references: List[str], max_distance: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Count the edits with jiwer, max_distance is ignored
+    """
+    output = jiwer.process_characters(reference=references, hypothesis=hypotheses)
+    errors = output.substitutions + output.deletions + output.insertions
+    return errors, output.hits + output.substitutions + output.deletions
+
+# Distance backends available to `cer()`, each returns (number of edits, number of reference characters)
+BACKENDS: Dict[str, Callable[..., Tuple[int, int]]] = {
+    'native': _native_counts,
+    'jiwer': _jiwer_counts,
+}
+
+# Smallest number of pairs sent to a worker process, smaller chunks cost more in inter-process traffic than they save
+MIN_CHUNK_SIZE = 2000
+
+def _pack(strings: List[str]) -> Tuple[str, np.ndarray]:
+    """
+    Pack a list of strings into one string and the lengths of its parts
+    A chunk is then pickled as two objects instead of one object per string.
+    """
+    return ''.join(strings), np.fromiter((len(string) for string in strings), dtype=np.int64, count=len(strings))
+
+def _unpack(packed: Tuple[str, np.ndarray]) -> List[str]:
+    """
+    Inverse of `_pack()`
+    """
+    text, lengths = packed
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+    return [text[start:end] for start, end in zip(starts, ends)]
+
+def _chunk_counts(packed_hypotheses: Tuple[str, np.ndarray], packed_references: Tuple[str, np.ndarray], backend: str, max_distance: Optional[int]) -> Tuple[int, int]:
+    """
+    Count the edits of one chunk of packed pairs in a worker process
+    """
+    return BACKENDS[backend](_unpack(packed_hypotheses), _unpack(packed_references), max_distance)
+
+def _chunk_distances(packed_hypotheses: Tuple[str, np.ndarray], packed_references: Tuple[str, np.ndarray], max_distance: Optional[int]) -> np.ndarray:
+    """
+    Compute the edit distance of every pair of one chunk of packed pairs in a worker process
+    """
+    return distance.levenshtein_batch(_unpack(packed_hypotheses), _unpack(packed_references), max_distance)
+
+# Process pools by number of workers, kept alive between calls so that scoring a file chunk by chunk,
+# or a server scoring batch after batch, only starts the worker processes once
+_WORKER_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_WORKER_POOLS_LOCK = threading.Lock()
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the persistent process pool of this number of workers, it is created on the first call
+    Args:
+        workers: number of worker processes, 0 uses all CPU cores
+    Returns:
+        executor: ProcessPoolExecutor shared by all the scoring functions, shut down at exit or by `shutdown_worker_pools()`
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    with _WORKER_POOLS_LOCK:
+        executor = _WORKER_POOLS.get(workers)
+        # A pool whose worker died can not be used anymore
+        if executor is None or getattr(executor, '_broken', False):
+            # Workers started before the resource tracker would each start their own, which then reports
+            # the `SharedReferences` blocks the workers read, and the parent unlinks, as leaked
+            resource_tracker.ensure_running()
+            executor = _WORKER_POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+        return executor
+
+def shutdown_worker_pools() -> None:
+    """
+    Stop the worker processes of all the persistent pools, new pools are created when needed
+    """
+    with _WORKER_POOLS_LOCK:
+        executors = list(_WORKER_POOLS.values())
+        _WORKER_POOLS.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+atexit.register(shutdown_worker_pools)
+
+def _forget_worker_pools() -> None:
+    # A forked process does not inherit the threads managing the pools of its parent, it starts its own pools
+    global _WORKER_POOLS_LOCK
+    _WORKER_POOLS.clear()
+    _WORKER_POOLS_LOCK = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_worker_pools)
+
+def _map_chunks(function: Callable, hypotheses: List[str], references: List[str], workers: int, chunk_size: Optional[int], *args) -> List[Any]:
+    """
+    Apply function(packed_hypotheses, packed_references, *args) to chunks of pairs in the persistent worker processes
+    Returns:
+        results: list of the results of the chunks, in order
+    """
+    if chunk_size is None:
+        chunk_size = max(MIN_CHUNK_SIZE, -(-len(references) // (workers * 4)))
+    executor = worker_pool(workers)
+    try:
+        futures = [
+            executor.submit(function, _pack(hypotheses[start:start + chunk_size]), _pack(references[start:start + chunk_size]), *args)
+            for start in range(0, len(references), chunk_size)
+        ]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # The next call starts a new pool
+        with _WORKER_POOLS_LOCK:
+            if _WORKER_POOLS.get(workers) is executor:
+                del _WORKER_POOLS[workers]
+        raise
+
+def _distances(hypotheses: List[str], references: List[str], workers: int, chunk_size: Optional[int]) -> np.ndarray:
+    """
+    Compute the exact edit distance of every pair, in worker processes if there are enough pairs
+    """
+    if workers == 1 or len(references) <= MIN_CHUNK_SIZE:
+        return distance.levenshtein_batch(hypotheses, references)
+    return np.concatenate(_map_chunks(_chunk_distances, hypotheses, references, workers, chunk_size, None))
+
+class SharedReferences:
+    """
+    References packed once in shared memory, worker processes read the references of their chunk
+    from it instead of receiving a copy with every task
+    Args:
+        references: list of strings
+    """
+
+    def __init__(self, references: List[str]):
+        encoded = [reference.encode('utf-8') for reference in references]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(reference) for reference in encoded], out=offsets[1:])
+        data = b''.join(encoded)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, offsets.nbytes + len(data)))
+        self.memory.buf[:offsets.nbytes] = offsets.tobytes()
+        self.memory.buf[offsets.nbytes:offsets.nbytes + len(data)] = data
+        # Picklable description of the block sent to the workers
+        self.handle = (self.memory.name, len(references))
+
+    def __enter__(self) -> 'SharedReferences':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the shared memory
+        """
+        self.memory.close()
+        self.memory.unlink()
+
+def _read_shared_references(handle: Tuple[str, int], positions: np.ndarray) -> List[str]:
+    """
+    Read the references at the given positions from a `SharedReferences` block
+    """
+    name, count = handle
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        offsets = np.frombuffer(memory.buf, dtype=np.int64, count=count + 1)
+        starts = (offsets[positions] + offsets.nbytes).tolist()
+        ends = (offsets[positions + 1] + offsets.nbytes).tolist()
+        del offsets  # The buffer can only be closed once no array uses it
+        return [bytes(memory.buf[start:end]).decode('utf-8') for start, end in zip(starts, ends)]
+    finally:
+        memory.close()
+
+def _chunk_shared_distances(packed_hypotheses: Tuple[str, np.ndarray], handle: Tuple[str, int], positions: np.ndarray) -> np.ndarray:
+    """
+    Compute the edit distance of every hypothesis of a chunk against its reference in shared memory, in a worker process
+    """
+    return distance.levenshtein_batch(_unpack(packed_hypotheses), _read_shared_references(handle, positions))
+
+def _cached_distances(hypotheses: List[str], references: List[str], workers: int, chunk_size: Optional[int], cache: ScoreCache) -> np.ndarray:
+    """
+    Compute the exact edit distance of every stripped pair, only scoring the pairs missing from the cache
+    """
+    # Short pairs are scored directly, the engine is faster on them than a cache lookup
+    lengths = np.maximum(np.fromiter(map(len, hypotheses), dtype=np.int64, count=len(hypotheses)), np.fromiter(map(len, references), dtype=np.int64, count=len(references)))
+    long_pairs = lengths >= cache.min_length
+    cache.bypassed += int(np.count_nonzero(~long_pairs))
+    if not long_pairs.any():
+        return _distances(hypotheses, references, workers, chunk_size)
+    cached = np.flatnonzero(long_pairs)
+    keys = keys_for_pairs([hypotheses[index] for index in cached], [references[index] for index in cached])
+    found = cache.get_many(keys)
+    missing = np.fromiter((key not in found for key in keys), dtype=bool, count=len(keys))
+
+    errors = np.zeros(len(references), dtype=np.int64)
+    errors[cached] = [found.get(key, 0) for key in keys]
+    scored = np.sort(np.concatenate([np.flatnonzero(~long_pairs), cached[missing]]))
+    errors[scored] = _distances([hypotheses[index] for index in scored], [references[index] for index in scored], workers, chunk_size)
+    cache.put_many([key for key, is_missing in zip(keys, missing) if is_missing], errors[cached[missing]])
+    return errors
+
+def _cached_counts(hypotheses: List[str], references: List[str], max_distance: Optional[int], workers: int, chunk_size: Optional[int], cache: ScoreCache) -> Tuple[int, int]:
+    """
+    Count the edits, computing only the distances of the pairs missing from the cache
+    """
+    # The cache is keyed by the pairs as they are scored
+    hypotheses = [hyp.strip() for hyp in hypotheses]
+    references = [ref.strip() for ref in references]
+    # Exact distances are cached, the cap is applied afterwards
+    errors = _cached_distances(hypotheses, references, workers, chunk_size, cache)
+    if max_distance is not None:
+        np.minimum(errors, max_distance + 1, out=errors)
+    return int(errors.sum()), sum(len(ref) for ref in references)
+
+def edit_counts(hypotheses: List[str], references: List[str], backend: str = 'native', max_distance: Optional[int] = None, workers: int = 1, chunk_size: Optional[int] = None, cache: Optional[ScoreCache] = None) -> Tuple[int, int]:
+    """
+    Count the character edits (S + D + I) and the reference characters over all pairs
+    Args:
+        hypotheses: list of strings
+        references: list of non-empty strings
+        backend: name of the distance backend in `BACKENDS`
+        max_distance: optional int, cap on the edits counted per pair, pairs above it count as max_distance + 1
+        workers: number of worker processes, 1 computes in the current process and 0 uses all CPU cores
+        chunk_size: optional int, number of pairs per worker task, by default about four tasks per worker
+        cache: optional ScoreCache, only the pairs missing from it are scored, with the native engine whatever the backend
+    Returns:
+        errors: int
+        reference_length: int
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', available backends are {', '.join(BACKENDS)}")
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if cache is not None:
+        return _cached_counts(hypotheses, references, max_distance, workers, chunk_size, cache)
+    if workers == 1 or len(references) <= MIN_CHUNK_SIZE:
+        return BACKENDS[backend](hypotheses, references, max_distance)
+    # The counts are integers, so summing the per-chunk counts gives exactly the serial result
+    errors, reference_length = 0, 0
+    for chunk_errors, chunk_reference_length in _map_chunks(_chunk_counts, hypotheses, references, workers, chunk_size, backend, max_distance):
+        errors += chunk_errors
+        reference_length += chunk_reference_length
+    return errors, reference_length
+
+def row_errors(hypotheses: List[str], references: List[str], workers: int = 1, chunk_size: Optional[int] = None, cache: Optional[ScoreCache] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the edit distance and the reference length of every pair with the native engine
+    Summing both arrays over the pairs with a non-empty reference gives the counts of `edit_counts()`,
+    so statistics such as bootstrap confidence intervals can resample the rows without scoring them again.
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        workers: number of worker processes, 1 computes in the current process and 0 uses all CPU cores
+        chunk_size: optional int, number of pairs per worker task
+        cache: optional ScoreCache, only the pairs missing from it are scored
+    Returns:
+        errors: numpy array of int64, edit distance of every pair
+        reference_length: numpy array of int64, number of characters of every stripped reference
+    """
+    if len(hypotheses) != len(references):
+        raise ValueError("Number of hypotheses and references should be the same")
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    # Same preprocessing as the default CER transformation of jiwer
+    hypotheses = [hyp.strip() for hyp in hypotheses]
+    references = [ref.strip() for ref in references]
+    if cache is not None:
+        errors = _cached_distances(hypotheses, references, workers, chunk_size, cache)
+    else:
+        errors = _distances(hypotheses, references, workers, chunk_size)
+    reference_length = np.fromiter((len(ref) for ref in references), dtype=np.int64, count=len(references))
+    return errors, reference_length
+
+def cer(hypotheses: List[str], references: List[str], backend: str = 'native', max_distance: Optional[int] = None, workers: int = 1, cache: Optional[ScoreCache] = None) -> float:
     """
     Compute Character Error Rate (CER) between hypotheses and references
     Args:
         hypotheses: list of strings
         references: list of strings
+        backend: name of the distance backend in `BACKENDS`, 'native' (default) or 'jiwer'
+        max_distance: optional int, cap on the edits counted per pair when only a bounded score is needed
+        workers: number of worker processes, 1 (default) computes in the current process and 0 uses all CPU cores
+        cache: optional ScoreCache of pair distances reused across evaluations
     Returns:
         cer: float
     """
@@ -28,24 +333,222 @@ def cer(hypotheses: List[str], references: List[str]) -> float:
     if len(filtered_references) == 0 and any(hyp.strip() for hyp in hypotheses):
         return 1.0
     
-    return jiwer.cer(filtered_hypotheses, filtered_references)
+    errors, reference_length = edit_counts(filtered_hypotheses, filtered_references, backend, max_distance, workers, cache=cache)
+    return errors / reference_length
 
-def read_file(file_path: str) -> pd.DataFrame:
+def row_token_errors(hypotheses: List[str], references: List[str], tokenizer=DEFAULT_TOKENIZER) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the token edit distance and the number of reference tokens of every pair
+    The token tuples are compared by the same engine as the characters, which hashes the tokens.
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        tokenizer: name in `tokenization.TOKENIZERS` or function from a string to its tokens
+    Returns:
+        errors: numpy array of int64, token edit distance of every pair
+        reference_tokens: numpy array of int64, number of tokens of every reference
     """
-    Read CSV or XLSX file and return the dataframe
+    if len(hypotheses) != len(references):
+        raise ValueError("Number of hypotheses and references should be the same")
+    hypotheses_tokens = tokenize(hypotheses, tokenizer)
+    references_tokens = tokenize(references, tokenizer)
+    errors = distance.levenshtein_batch(hypotheses_tokens, references_tokens)
+    reference_tokens = np.fromiter((len(tokens) for tokens in references_tokens), dtype=np.int64, count=len(references_tokens))
+    return errors, reference_tokens
 
+def token_error_rate(hypotheses: List[str], references: List[str], tokenizer=DEFAULT_TOKENIZER) -> float:
+    """
+    Compute the token error rate between hypotheses and references, e.g. the WER with words as tokens
     Args:
-        file_path (str): path to the file
+        hypotheses: list of strings
+        references: list of strings, pairs whose reference has no token are ignored
+        tokenizer: name in `tokenization.TOKENIZERS` ('whitespace', 'thai' or 'grapheme') or function from a string to its tokens
     Returns:
-        dataframe (pandas.DataFrame): dataframe containing the data
+        error_rate: float
     """
-    if file_path.endswith('.csv'):
-        return pd.read_csv(file_path)
-    elif file_path.endswith('.xlsx'):
-        return pd.read_excel(file_path)
-    else:
-        raise ValueError("Only CSV and XLSX files are supported")
-    
+    errors, reference_tokens = row_token_errors(hypotheses, references, tokenizer)
+    valid = reference_tokens > 0
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if not valid.any():
+        return 1.0
+    return int(errors[valid].sum()) / int(reference_tokens[valid].sum())
+
+def wer(hypotheses: List[str], references: List[str], tokenizer=DEFAULT_TOKENIZER) -> float:
+    """
+    Compute Word Error Rate (WER) between hypotheses and references
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        tokenizer: 'whitespace' (default) for space-separated languages, 'thai' for Thai text written without spaces
+    Returns:
+        wer: float
+    """
+    return token_error_rate(hypotheses, references, tokenizer)
+
+def stream_cer(hypotheses_chunks: Iterable[List[str]], references_chunks: Iterable[List[str]], backend: str = 'native', max_distance: Optional[int] = None, workers: int = 1, cache: Optional[ScoreCache] = None) -> float:
+    """
+    Compute Character Error Rate (CER) over chunks of hypotheses and references, e.g. from `read_column_chunks()`
+    Only one chunk is held in memory at a time, the edit counts are accumulated across chunks.
+    The result is the same as `cer()` on the concatenated chunks.
+    Args:
+        hypotheses_chunks: iterable of lists of strings
+        references_chunks: iterable of lists of strings, aligned with hypotheses_chunks
+        backend: name of the distance backend in `BACKENDS`
+        max_distance: optional int, cap on the edits counted per pair when only a bounded score is needed
+        workers: number of worker processes used for each chunk, 0 uses all CPU cores
+        cache: optional ScoreCache of pair distances reused across evaluations
+    Returns:
+        cer: float
+    """
+    errors, reference_length = 0, 0
+    for hypotheses, references in zip_longest(hypotheses_chunks, references_chunks):
+        if hypotheses is None or references is None or len(hypotheses) != len(references):
+            raise ValueError("Number of hypotheses and references should be the same")
+        # Filter out pairs where reference is empty string, as in `cer()`
+        pairs = [(hyp, ref) for hyp, ref in zip(hypotheses, references) if ref.strip()]
+        if not pairs:
+            continue
+        chunk_errors, chunk_reference_length = edit_counts([hyp for hyp, _ in pairs], [ref for _, ref in pairs], backend, max_distance, workers, cache=cache)
+        errors += chunk_errors
+        reference_length += chunk_reference_length
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if reference_length == 0:
+        return 1.0
+    return errors / reference_length
+
+# Columns of the per-row edit counts returned by `row_edit_counts()`
+EDIT_COUNT_COLUMNS = ['substitutions', 'deletions', 'insertions', 'reference_length']
+# Columns added by `column_edit_counts()` when a tokenizer is given, see `row_token_errors()`
+TOKEN_COUNT_COLUMNS = ['token_errors', 'reference_tokens']
+
+def row_edit_counts(hypotheses: List[str], references: List[str], confusions: Optional[Counter] = None) -> pd.DataFrame:
+    """
+    Count the substitutions, deletions and insertions of every pair, with the reference length, in one pass
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        confusions: optional Counter of (reference character, hypothesis character) edits updated in the same pass, see `distance.edit_operations_batch()`
+    Returns:
+        counts: pandas.DataFrame with one row per pair and the columns in `EDIT_COUNT_COLUMNS`
+    """
+    # Same preprocessing as the default CER transformation of jiwer
+    hypotheses = [hyp.strip() for hyp in hypotheses]
+    references = [ref.strip() for ref in references]
+    operations = distance.edit_operations_batch(hypotheses, references, confusions)
+    reference_length = np.fromiter((len(ref) for ref in references), dtype=np.int64, count=len(references))
+    return pd.DataFrame({
+        'substitutions': operations[:, 0],
+        'deletions': operations[:, 1],
+        'insertions': operations[:, 2],
+        'reference_length': reference_length,
+    })
+
+def column_edit_counts(hypotheses_dataframe: pd.DataFrame, references_dataframe: pd.DataFrame, columns: List[str], steps: List[str] = DEFAULT_STEPS, confusions: Optional[Counter] = None, tokenizer=None) -> pd.DataFrame:
+    """
+    Count the edits of every row of every column, each column is normalized once with `normalize()`
+    Args:
+        hypotheses_dataframe: pandas.DataFrame
+        references_dataframe: pandas.DataFrame, rows aligned with hypotheses_dataframe
+        columns: list of column names present in both dataframes
+        steps: list of normalization steps, see `normalization.NORMALIZATION_STEPS`
+        confusions: optional Counter of character edits over all columns updated in the same pass
+        tokenizer: optional tokenizer, the token edits of the same normalized strings are also counted
+    Returns:
+        counts: pandas.DataFrame with the columns 'column', 'row' (position in the dataframes), the ones in
+            `EDIT_COUNT_COLUMNS` and, with a tokenizer, the ones in `TOKEN_COUNT_COLUMNS`
+    """
+    if len(hypotheses_dataframe) != len(references_dataframe):
+        raise ValueError("Number of hypotheses and references should be the same")
+    counts = []
+    for column in columns:
+        hypotheses = normalize(hypotheses_dataframe[column], steps)
+        references = normalize(references_dataframe[column], steps)
+        column_counts = row_edit_counts(hypotheses, references, confusions)
+        if tokenizer is not None:
+            column_counts['token_errors'], column_counts['reference_tokens'] = row_token_errors(hypotheses, references, tokenizer)
+        column_counts.insert(0, 'column', column)
+        column_counts.insert(1, 'row', np.arange(len(column_counts)))
+        counts.append(column_counts)
+    if not counts:
+        return pd.DataFrame(columns=['column', 'row'] + EDIT_COUNT_COLUMNS + (TOKEN_COUNT_COLUMNS if tokenizer is not None else []))
+    return pd.concat(counts, ignore_index=True)
+
+def _chunk_alignments(packed_hypotheses: Tuple[str, np.ndarray], packed_references: Tuple[str, np.ndarray]) -> Tuple[pd.DataFrame, Counter]:
+    """
+    Count the edits and the character confusions of one chunk of packed pairs in a worker process
+    """
+    confusions = Counter()
+    return row_edit_counts(_unpack(packed_hypotheses), _unpack(packed_references), confusions), confusions
+
+def alignment_counts(hypotheses: List[str], references: List[str], workers: int = 1, chunk_size: Optional[int] = None) -> Tuple[pd.DataFrame, Counter]:
+    """
+    Align every pair once to get both its edit counts and the confused characters
+    Each worker counts the confusions of its chunks in its own Counter, the Counters are then summed.
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        workers: number of worker processes, 1 computes in the current process and 0 uses all CPU cores
+        chunk_size: optional int, number of pairs per worker task
+    Returns:
+        counts: pandas.DataFrame of `row_edit_counts()`, `cer_from_counts()` gives the CER
+        confusions: Counter of (reference character, hypothesis character) edits, '' for the missing side
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(references) <= MIN_CHUNK_SIZE:
+        confusions = Counter()
+        return row_edit_counts(hypotheses, references, confusions), confusions
+    counts, confusions = [], Counter()
+    for chunk_counts, chunk_confusions in _map_chunks(_chunk_alignments, hypotheses, references, workers, chunk_size):
+        counts.append(chunk_counts)
+        confusions.update(chunk_confusions)
+    return pd.concat(counts, ignore_index=True), confusions
+
+def cer_from_counts(counts: pd.DataFrame) -> float:
+    """
+    Compute Character Error Rate (CER) from per-row edit counts, rows with an empty reference are ignored as in `cer()`
+    Args:
+        counts: pandas.DataFrame with the columns in `EDIT_COUNT_COLUMNS`
+    Returns:
+        cer: float
+    """
+    valid = counts[counts['reference_length'] > 0]
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if valid.empty:
+        return 1.0
+    errors = int(valid['substitutions'].sum() + valid['deletions'].sum() + valid['insertions'].sum())
+    return errors / int(valid['reference_length'].sum())
+
+def wer_from_counts(counts: pd.DataFrame) -> float:
+    """
+    Compute the word or token error rate from per-row token counts, rows without reference tokens are ignored as in `token_error_rate()`
+    Args:
+        counts: pandas.DataFrame with the columns in `TOKEN_COUNT_COLUMNS`
+    Returns:
+        wer: float
+    """
+    valid = counts[counts['reference_tokens'] > 0]
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if valid.empty:
+        return 1.0
+    return int(valid['token_errors'].sum()) / int(valid['reference_tokens'].sum())
+
+def summarize_edit_counts(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the output of `column_edit_counts()` per column
+    Args:
+        counts: pandas.DataFrame returned by `column_edit_counts()`
+    Returns:
+        summary: pandas.DataFrame indexed by column name with the summed `EDIT_COUNT_COLUMNS` and the 'cer' of each
+            column, with the summed `TOKEN_COUNT_COLUMNS` and the 'wer' when the tokens were counted
+    """
+    has_tokens = all(column in counts.columns for column in TOKEN_COUNT_COLUMNS)
+    summary = counts.groupby('column', sort=False)[EDIT_COUNT_COLUMNS + (TOKEN_COUNT_COLUMNS if has_tokens else [])].sum()
+    summary['cer'] = [cer_from_counts(group) for _, group in counts.groupby('column', sort=False)]
+    if has_tokens:
+        summary['wer'] = [wer_from_counts(group) for _, group in counts.groupby('column', sort=False)]
+    return summary
+
 def get_column_to_list(dataframe: pd.DataFrame, column_name: str) -> List[str]:
     """
     Get the values of a column from a dataframe and return as a list
@@ -83,6 +586,85 @@ def get_matched_columns(hypotheses_dataframe: pd.DataFrame, references_dataframe
     references_columns = references_dataframe.columns[1:]
     return list(set(hypotheses_columns).intersection(references_columns))
 
+class JoinReport(NamedTuple):
+    """
+    Keys that could not be paired one to one by `join_on_key()`
+    """
+    unmatched_hypotheses: List[Any]
+    unmatched_references: List[Any]
+    duplicate_hypotheses: List[Any]
+    duplicate_references: List[Any]
+
+def _first_positions(codes: np.ndarray, size: int) -> np.ndarray:
+    """
+    Position of the first occurrence of each code, -1 for the codes that do not occur, negative codes are skipped
+    """
+    positions = np.full(size, -1, dtype=np.int64)
+    rows = np.flatnonzero(codes >= 0)
+    # Assigned backwards so that the first occurrence is written last
+    positions[codes[rows[::-1]]] = rows[::-1]
+    return positions
+
+def _missing_keys(keys: np.ndarray) -> np.ndarray:
+    """
+    Rows without a key, missing values and blank strings
+    """
+    missing = pd.isna(keys)
+    if keys.dtype == object:
+        missing |= np.fromiter((isinstance(key, str) and not key.strip() for key in keys), dtype=bool, count=len(keys))
+    return missing
+
+def _join_positions(hypotheses_keys: Sequence[Any], references_keys: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray, JoinReport]:
+    """
+    Pair the positions of the hypotheses and references with the same key, in the order of the hypotheses
+    Rows with a missing or blank key are never paired, they are reported as unmatched.
+    """
+    hypotheses_keys, references_keys = pd.Series(hypotheses_keys).to_numpy(), pd.Series(references_keys).to_numpy()
+    hypotheses_rows = len(hypotheses_keys)
+    # The keys of both sides are hashed once, by pandas, into integer codes shared by the two sides, -1 for no key
+    all_keys = np.concatenate([hypotheses_keys, references_keys])
+    codes, unique_keys = pd.factorize(all_keys)
+    codes[_missing_keys(all_keys)] = -1
+    hypotheses_codes, references_codes = codes[:hypotheses_rows], codes[hypotheses_rows:]
+    hypotheses_first, references_first = _first_positions(hypotheses_codes, len(unique_keys)), _first_positions(references_codes, len(unique_keys))
+
+    hypotheses_unique = (hypotheses_codes >= 0) & (hypotheses_first[hypotheses_codes] == np.arange(hypotheses_rows))
+    references_unique = (references_codes >= 0) & (references_first[references_codes] == np.arange(len(references_codes)))
+    # Position of the reference paired with each hypothesis, -1 if none
+    found = np.full(hypotheses_rows, -1, dtype=np.int64)
+    found[hypotheses_unique] = references_first[hypotheses_codes[hypotheses_unique]]
+    matched = found >= 0
+    report = JoinReport(
+        hypotheses_keys[(hypotheses_codes < 0) | (hypotheses_unique & ~matched)].tolist(),
+        references_keys[(references_codes < 0) | (references_unique & (hypotheses_first[references_codes] < 0))].tolist(),
+        hypotheses_keys[(hypotheses_codes >= 0) & ~hypotheses_unique].tolist(),
+        references_keys[(references_codes >= 0) & ~references_unique].tolist(),
+    )
+    return np.flatnonzero(matched), found[matched], report
+
+def join_on_key(hypotheses_dataframe: pd.DataFrame, references_dataframe: pd.DataFrame, key_column: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, JoinReport]:
+    """
+    Align the rows of the two dataframes on a key column with the hash tables of pandas, in linear time
+    Rows are kept in the order of the hypotheses dataframe. Rows whose key is missing or has no counterpart are
+    dropped and for duplicated keys only the first occurrence is used, both are listed in the report.
+    Args:
+        hypotheses_dataframe: pandas.DataFrame
+        references_dataframe: pandas.DataFrame
+        key_column: optional column name present in both dataframes, by default the first column of each dataframe
+    Returns:
+        aligned_hypotheses_dataframe: pandas.DataFrame
+        aligned_references_dataframe: pandas.DataFrame
+        report: JoinReport
+    """
+    hypotheses_key = key_column if key_column is not None else hypotheses_dataframe.columns[0]
+    references_key = key_column if key_column is not None else references_dataframe.columns[0]
+    hypotheses_positions, references_positions, report = _join_positions(hypotheses_dataframe[hypotheses_key], references_dataframe[references_key])
+    return (
+        hypotheses_dataframe.iloc[hypotheses_positions].reset_index(drop=True),
+        references_dataframe.iloc[references_positions].reset_index(drop=True),
+        report,
+    )
+
 def concatenate_columns(dataframe: pd.DataFrame, columns: List[str]) -> List[str]:
     """
     Concatenate the values of the columns in the dataframe and return as a list of string.
@@ -100,4 +682,75 @@ def concatenate_columns(dataframe: pd.DataFrame, columns: List[str]) -> List[str
 
 
 
-    
\ No newline at end of file
+    
+def evaluate_systems(systems: Dict[str, pd.DataFrame], references_dataframe: pd.DataFrame, columns: List[str], key_column: Optional[str] = None, steps: List[str] = DEFAULT_STEPS, workers: int = 1, chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    Score several systems against the same references and rank them
+    The references are normalized once for all systems. With several workers they are packed once in
+    shared memory, the workers only receive the hypotheses and the positions of their references.
+    Args:
+        systems: dict mapping the name of each system to its pandas.DataFrame of hypotheses
+        references_dataframe: pandas.DataFrame of references
+        columns: list of column names present in every dataframe
+        key_column: optional column name used to pair the rows with `join_on_key()`, rows are paired by position otherwise
+        steps: list of normalization steps, see `normalization.NORMALIZATION_STEPS`
+        workers: number of worker processes, 1 computes in the current process and 0 uses all CPU cores
+        chunk_size: optional int, number of pairs per worker task
+    Returns:
+        leaderboard: pandas.DataFrame indexed by system, best first, with the number of paired 'rows',
+            the number of 'unmatched_references', the 'overall' CER over all columns and the CER of each column
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    reference_rows = len(references_dataframe)
+    references_keys = references_dataframe[key_column] if key_column is not None else None
+    # The references of all columns one after the other, a reference is found at column_index * reference_rows + row
+    references = [reference.strip() for column in columns for reference in normalize(references_dataframe[column], steps)]
+    reference_length = np.fromiter((len(reference) for reference in references), dtype=np.int64, count=len(references))
+
+    # The pairs of every system are gathered first, so that the workers score all systems in one pool
+    pairs = {}
+    for name, hypotheses_dataframe in systems.items():
+        if key_column is not None:
+            hypotheses_positions, references_positions, report = _join_positions(hypotheses_dataframe[key_column], references_keys)
+            unmatched_references = len(report.unmatched_references)
+        elif len(hypotheses_dataframe) == reference_rows:
+            hypotheses_positions = references_positions = list(range(reference_rows))
+            unmatched_references = 0
+        else:
+            raise ValueError(f"Number of hypotheses of {name} and references should be the same")
+        hypotheses = []
+        for column in columns:
+            hypotheses += [hypothesis.strip() for hypothesis in normalize(hypotheses_dataframe[column].iloc[hypotheses_positions], steps)]
+        positions = (np.arange(len(columns))[:, None] * reference_rows + np.asarray(references_positions, dtype=np.int64)).ravel()
+        pairs[name] = (hypotheses, positions, unmatched_references)
+
+    if workers == 1:
+        distances = {name: distance.levenshtein_batch(hypotheses, [references[position] for position in positions]) for name, (hypotheses, positions, _) in pairs.items()}
+    else:
+        total_pairs = sum(len(positions) for _, positions, _ in pairs.values())
+        if chunk_size is None:
+            chunk_size = max(MIN_CHUNK_SIZE, -(-total_pairs // (workers * 4)))
+        executor = worker_pool(workers)
+        with SharedReferences(references) as shared:
+            futures = {
+                name: [executor.submit(_chunk_shared_distances, _pack(hypotheses[start:start + chunk_size]), shared.handle, positions[start:start + chunk_size])
+                       for start in range(0, len(positions), chunk_size)]
+                for name, (hypotheses, positions, _) in pairs.items()
+            }
+            distances = {name: np.concatenate([future.result() for future in name_futures] or [np.zeros(0, dtype=np.int64)]) for name, name_futures in futures.items()}
+
+    rows = []
+    for name, (hypotheses, positions, unmatched_references) in pairs.items():
+        errors, lengths = distances[name], reference_length[positions]
+        # Pairs with an empty reference are ignored and CER is 1.0 without valid pairs, as in `cer()`
+        valid = lengths > 0
+        row = {'system': name, 'rows': len(positions) // max(1, len(columns)), 'unmatched_references': unmatched_references,
+               'overall': int(errors[valid].sum()) / int(lengths[valid].sum()) if valid.any() else 1.0}
+        column_index = positions // max(1, reference_rows)
+        for index, column in enumerate(columns):
+            in_column = valid & (column_index == index)
+            row[column] = int(errors[in_column].sum()) / int(lengths[in_column].sum()) if in_column.any() else 1.0
+        rows.append(row)
+    leaderboard = pd.DataFrame(rows, columns=['system', 'rows', 'unmatched_references', 'overall'] + list(columns))
+    return leaderboard.set_index('system').sort_values('overall', kind='stable')
@@ -1,33 +1,98 @@
 ####################################################################################################
 # Description: This script calculates the Character Error Rate (CER) of the predicted text against
-# the ground truth text. The script reads the predictions and groundtruth from separate CSV or XLSX files.
+# the ground truth text. The script reads the predictions and groundtruth from separate CSV, XLSX, Parquet,
+# Arrow or JSON lines files (CSV and JSON lines may be gzip'd).
 # The columns containing the predictions and groundtruth are specified in the arguments.
 # The script uses the function in `cer` module  to calculate the CER.
 # Usage: python cer_calculation.py --predictions predictions.csv --groundtruth groundtruth.csv --prediction_column pred --groundtruth_column gt
+# Add `--workers N` to spread the computation over N processes (0 for all CPU cores).
+# Files other than XLSX are read and scored in chunks of `--chunk_size` rows so that memory use does not grow with
+# the file size, use `--no_streaming` to load the whole files instead. Only the needed columns are decoded.
+# With `--id_column ID` the rows are paired by the value of the ID column instead of by their position.
+# With `--cache_dir DIR` the distance of each pair is cached in DIR so that reruns only score the changed lines.
+# With `--id_column ID --state_file STATE` the per-row counts are kept in STATE and reruns only score the rows
+# added or changed since the previous run.
+# The text is normalized with the steps given to `--normalization` (lowercase and strip by default).
+# With `--bootstrap N` the CER is reported with a confidence interval from N bootstrap samples, and with
+# `--compare_predictions OTHER` the two prediction files are compared with a paired bootstrap.
+# With `--confusions FILE` the substituted, deleted and inserted characters are counted in the same pass as the
+# CER, written to FILE (.csv or .parquet) and the `--top_confusions` most frequent ones are printed.
+# Several prediction files (or several pairs of columns) are ranked in a leaderboard of their overall and
+# per-column CER, the groundtruth is read and normalized only once:
+# python cer_calculation.py --predictions a.csv b.csv c.csv --groundtruth groundtruth.csv --prediction_column pred --groundtruth_column gt
+# With `--metrics cer wer` the word error rate is computed from the same loaded and normalized pairs as the CER,
+# the words are split by the `--tokenizer` (whitespace by default, `thai` for Thai text written without spaces).
 ####################################################################################################
 
 import argparse
-from typing import List
+import sys
+from collections import Counter
+from itertools import zip_longest
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import bootstrap
 import cer
+import confusion
+import incremental
+import normalization
+import tokenization
 
-def main(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str) -> float:
+# Metrics computed by `metrics_main()`, the WER uses the tokens of `--tokenizer`
+METRICS = ['cer', 'wer']
+
+def processed_chunks(file_path: str, column_name: str, chunk_size: int, name: str, steps: List[str] = normalization.DEFAULT_STEPS, allow_empty: bool = False) -> Iterator[List[str]]:
     """
-    Calculate the Character Error Rate (CER) between predictions and groundtruth
+    Read a column of a file in chunks and normalize each chunk
+    Args:
+        file_path: path to a file in one of `readers.STREAMING_FORMATS`
+        column_name: column name in the file
+        chunk_size: number of rows per chunk
+        name: name of the values in error messages
+        steps: list of normalization steps
+        allow_empty: keep the empty and missing values as empty strings instead of raising
+    Returns:
+        chunks: iterator of lists of normalized strings
+    """
+    for chunk in cer.read_column_chunks(file_path, column_name, chunk_size):
+        chunk = normalization.normalize(chunk, steps)
+        if not allow_empty and any([not value.strip() for value in chunk]):
+            raise ValueError(f"Some {name} are empty")
+        yield chunk
+
+def load_pairs(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, id_column: Optional[str] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> Tuple[Optional[List[Any]], List[str], List[str]]:
+    """
+    Load the whole prediction and groundtruth columns, pair and normalize them
     Args:
         predictions_file: path to the predictions file
         groundtruth_file: path to the groundtruth file
         prediction_column: column name in the predictions file
         groundtruth_column: column name in the groundtruth file
+        id_column: optional column name present in both files used to pair the rows, rows are paired by position otherwise
+        steps: list of normalization steps, see `normalization.NORMALIZATION_STEPS`
     Returns:
-        cer: float
+        keys: list of the IDs of the pairs, None when the rows are paired by position
+        predictions: list of normalized strings
+        groundtruth: list of normalized strings
     """
-    predictions_df = cer.read_file(predictions_file)
-    groundtruth_df = cer.read_file(groundtruth_file)
-    predictions = cer.get_column_to_list(predictions_df, prediction_column)
-    groundtruth = cer.get_column_to_list(groundtruth_df, groundtruth_column)
-    # Process each element in predictions and groundtruth
-    predictions = [cer.process_text(pred) for pred in predictions]
-    groundtruth = [cer.process_text(gt) for gt in groundtruth]
+    keys = None
+    if id_column is None:
+        # Only the text columns are decoded, as text like the streamed chunks so that every path scores the same strings
+        predictions_df = cer.read_file(predictions_file, [prediction_column], as_text=True)
+        groundtruth_df = cer.read_file(groundtruth_file, [groundtruth_column], as_text=True)
+    else:
+        # Only the key and the text columns are parsed
+        predictions_df = cer.read_file(predictions_file, [id_column, prediction_column], as_text=True)
+        groundtruth_df = cer.read_file(groundtruth_file, [id_column, groundtruth_column], as_text=True)
+        predictions_df, groundtruth_df, report = cer.join_on_key(predictions_df, groundtruth_df, id_column)
+        if report.unmatched_hypotheses or report.unmatched_references:
+            print(f"Warning: {len(report.unmatched_hypotheses)} predictions and {len(report.unmatched_references)} groundtruth rows have no matching {id_column} and are ignored")
+        if report.duplicate_hypotheses or report.duplicate_references:
+            print(f"Warning: {len(report.duplicate_hypotheses)} predictions and {len(report.duplicate_references)} groundtruth rows have a duplicated {id_column}, only the first occurrence is used")
+        keys = cer.get_column_to_list(predictions_df, id_column)
+    # Normalize the predictions and groundtruth columns at once
+    predictions = normalization.normalize(predictions_df[prediction_column], steps)
+    groundtruth = normalization.normalize(groundtruth_df[groundtruth_column], steps)
     # Check if the number of predictions and groundtruth are the same
     assert len(predictions) == len(groundtruth), "Number of predictions and groundtruth should be the same"
     # Check if any of elements in predictions and groundtruth are float
@@ -35,20 +100,253 @@ def main(predictions_file: str, groundtruth_file: str, prediction_column: str, g
         raise ValueError("Some predictions are float")
     if any([isinstance(gt, float) for gt in groundtruth]):
         raise ValueError("Some groundtruth are float")
-    # Check if any of elements in predictions and groundtruth are empty
-    if any([not pred.strip() for pred in predictions]):
-        raise ValueError("Some predictions are empty")
+    # Missing and empty predictions are scored as empty strings, i.e. as deletions of the whole groundtruth,
+    # but every groundtruth should have a text
     if any([not gt.strip() for gt in groundtruth]):
         raise ValueError("Some groundtruth are empty")
-    return cer.cer(predictions, groundtruth)
+    return keys, predictions, groundtruth
+
+def _streamable(predictions_file: str, groundtruth_file: str, streaming: bool, id_column: Optional[str]) -> bool:
+    return id_column is None and streaming and cer.file_format(predictions_file) in cer.STREAMING_FORMATS and cer.file_format(groundtruth_file) in cer.STREAMING_FORMATS
+
+def main(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, workers: int = 1, streaming: bool = True, chunk_size: int = 100000, id_column: Optional[str] = None, cache: Optional[cer.ScoreCache] = None, state_file: Optional[str] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> float:
+    """
+    Calculate the Character Error Rate (CER) between predictions and groundtruth
+    Args:
+        predictions_file: path to the predictions file
+        groundtruth_file: path to the groundtruth file
+        prediction_column: column name in the predictions file
+        groundtruth_column: column name in the groundtruth file
+        workers: number of worker processes, 0 for all CPU cores
+        streaming: read and score the files in chunks instead of loading them whole, unless a file is XLSX
+        chunk_size: number of rows per chunk when streaming
+        id_column: optional column name present in both files used to pair the rows, rows are paired by position otherwise
+        cache: optional cache of pair distances reused across runs
+        state_file: optional path to the per-row state of the previous run, only the added and changed rows are scored, requires id_column
+        steps: list of normalization steps, see `normalization.NORMALIZATION_STEPS`
+    Returns:
+        cer: float
+    """
+    if state_file is not None and id_column is None:
+        raise ValueError("An ID column is required to compare the rows with the previous run")
+    if _streamable(predictions_file, groundtruth_file, streaming, id_column):
+        predictions = processed_chunks(predictions_file, prediction_column, chunk_size, "predictions", steps, allow_empty=True)
+        groundtruth = processed_chunks(groundtruth_file, groundtruth_column, chunk_size, "groundtruth", steps)
+        return cer.stream_cer(predictions, groundtruth, workers=workers, cache=cache)
+    keys, predictions, groundtruth = load_pairs(predictions_file, groundtruth_file, prediction_column, groundtruth_column, id_column, steps)
+    if state_file is not None:
+        cer_score, report = incremental.incremental_cer(keys, predictions, groundtruth, state_file)
+        print(f"Rows: {report.added} added, {report.changed} changed, {report.removed} removed, {report.unchanged} unchanged")
+        return cer_score
+    return cer.cer(predictions, groundtruth, workers=workers, cache=cache)
+
+def pair_chunks(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, streaming: bool = True, chunk_size: int = 100000, id_column: Optional[str] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> Iterator[Tuple[Optional[List[Any]], List[str], List[str]]]:
+    """
+    Read the normalized pairs in chunks when the files can be streamed, or at once otherwise
+    Args:
+        same as `main()`
+    Returns:
+        chunks: iterator of (keys, predictions, groundtruth), keys is None when the rows are paired by position
+    """
+    if not _streamable(predictions_file, groundtruth_file, streaming, id_column):
+        yield load_pairs(predictions_file, groundtruth_file, prediction_column, groundtruth_column, id_column, steps)
+        return
+    predictions = processed_chunks(predictions_file, prediction_column, chunk_size, "predictions", steps, allow_empty=True)
+    groundtruth = processed_chunks(groundtruth_file, groundtruth_column, chunk_size, "groundtruth", steps)
+    for prediction_chunk, groundtruth_chunk in zip_longest(predictions, groundtruth):
+        if prediction_chunk is None or groundtruth_chunk is None or len(prediction_chunk) != len(groundtruth_chunk):
+            raise ValueError("Number of predictions and groundtruth should be the same")
+        yield None, prediction_chunk, groundtruth_chunk
+
+def row_scores(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, workers: int = 1, streaming: bool = True, chunk_size: int = 100000, id_column: Optional[str] = None, cache: Optional[cer.ScoreCache] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> pd.DataFrame:
+    """
+    Score every pair once and keep the per-row counts, e.g. for bootstrap resampling
+    Args:
+        same as `main()`
+    Returns:
+        scores: pandas.DataFrame with the columns errors and reference_length, indexed by the ID column or by position
+    """
+    scores = []
+    for keys, predictions, groundtruth in pair_chunks(predictions_file, groundtruth_file, prediction_column, groundtruth_column, streaming, chunk_size, id_column, steps):
+        errors, reference_length = cer.row_errors(predictions, groundtruth, workers, cache=cache)
+        scores.append(pd.DataFrame({'errors': errors, 'reference_length': reference_length}, index=keys))
+    if not scores:
+        return pd.DataFrame({'errors': np.zeros(0, dtype=np.int64), 'reference_length': np.zeros(0, dtype=np.int64)})
+    # Chunks read by position are numbered from 0 each, so their index is rebuilt
+    return pd.concat(scores, ignore_index=id_column is None)
+
+def confusion_main(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, workers: int = 1, streaming: bool = True, chunk_size: int = 100000, id_column: Optional[str] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> Tuple[float, Counter]:
+    """
+    Calculate the CER and count the confused characters from the same alignment of every pair
+    Args:
+        same as `main()`
+    Returns:
+        cer: float
+        confusions: Counter of (reference character, hypothesis character) edits, see `confusion.confusion_table()`
+    """
+    totals = np.zeros(len(cer.EDIT_COUNT_COLUMNS), dtype=np.int64)
+    confusions = Counter()
+    for _, predictions, groundtruth in pair_chunks(predictions_file, groundtruth_file, prediction_column, groundtruth_column, streaming, chunk_size, id_column, steps):
+        counts, chunk_confusions = cer.alignment_counts(predictions, groundtruth, workers)
+        # Only the sums of the per-row counts are kept, pairs with an empty reference are ignored as in `cer.cer()`
+        totals += counts[counts['reference_length'] > 0][cer.EDIT_COUNT_COLUMNS].sum().to_numpy()
+        confusions.update(chunk_confusions)
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if totals[-1] == 0:
+        return 1.0, confusions
+    return int(totals[:-1].sum()) / int(totals[-1]), confusions
+
+def metrics_main(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, metrics: List[str], tokenizer: str = tokenization.DEFAULT_TOKENIZER, workers: int = 1, streaming: bool = True, chunk_size: int = 100000, id_column: Optional[str] = None, cache: Optional[cer.ScoreCache] = None, steps: List[str] = normalization.DEFAULT_STEPS) -> Dict[str, float]:
+    """
+    Calculate the CER and the WER from a single pass over the loaded and normalized pairs
+    Args:
+        metrics: list of metrics in `METRICS`
+        tokenizer: name in `tokenization.TOKENIZERS` of the tokenizer of the WER
+        others: same as `main()`, the cache only stores the character distances
+    Returns:
+        scores: dict of the score of every metric, 1.0 when no pair has a non-empty reference
+    """
+    # Summed errors and reference lengths (characters or tokens) of every metric
+    totals = {metric: [0, 0] for metric in metrics}
+    for _, predictions, groundtruth in pair_chunks(predictions_file, groundtruth_file, prediction_column, groundtruth_column, streaming, chunk_size, id_column, steps):
+        for metric in metrics:
+            if metric == 'cer':
+                errors, reference_length = cer.row_errors(predictions, groundtruth, workers, cache=cache)
+            else:
+                errors, reference_length = cer.row_token_errors(predictions, groundtruth, tokenizer)
+            # Pairs with an empty reference are ignored as in `cer.cer()`
+            valid = reference_length > 0
+            totals[metric][0] += int(errors[valid].sum())
+            totals[metric][1] += int(reference_length[valid].sum())
+    return {metric: errors / length if length else 1.0 for metric, (errors, length) in totals.items()}
+
+def bootstrap_main(predictions_file: str, groundtruth_file: str, prediction_column: str, groundtruth_column: str, samples: int = 1000, confidence: float = 0.95, compare_file: Optional[str] = None, compare_column: Optional[str] = None, seed: Optional[int] = None, **options) -> Union[bootstrap.BootstrapResult, bootstrap.PairedBootstrapResult]:
+    """
+    Compute the bootstrap confidence interval of the CER, or compare two prediction files with a paired bootstrap
+    Args:
+        predictions_file: path to the predictions file
+        groundtruth_file: path to the groundtruth file
+        prediction_column: column name in the predictions file
+        groundtruth_column: column name in the groundtruth file
+        samples: number of bootstrap samples
+        confidence: confidence level of the intervals
+        compare_file: optional path to a second predictions file, compared to the first one with a paired bootstrap
+        compare_column: column name in the second predictions file, prediction_column by default
+        seed: optional seed of the resampling
+        options: workers, streaming, chunk_size, id_column, cache and steps as in `main()`
+    Returns:
+        result: BootstrapResult, or PairedBootstrapResult when compare_file is given
+    """
+    scores = row_scores(predictions_file, groundtruth_file, prediction_column, groundtruth_column, **options)
+    if compare_file is None:
+        return bootstrap.bootstrap_cer(scores['errors'].to_numpy(), scores['reference_length'].to_numpy(), samples, confidence, seed)
+    compare_scores = row_scores(compare_file, groundtruth_file, compare_column or prediction_column, groundtruth_column, **options)
+    if options.get('id_column') is None and len(scores) != len(compare_scores):
+        raise ValueError("Both predictions files should have the same number of rows")
+    # Only the groundtruth rows predicted in both files are compared
+    scores = scores.join(compare_scores['errors'].rename('compare_errors'), how='inner')
+    return bootstrap.paired_bootstrap(scores['errors'].to_numpy(), scores['compare_errors'].to_numpy(), scores['reference_length'].to_numpy(), samples, confidence, seed)
+
+def leaderboard_main(predictions_files: List[str], groundtruth_file: str, prediction_columns: List[str], groundtruth_columns: List[str], id_column: Optional[str] = None, workers: int = 1, steps: List[str] = normalization.DEFAULT_STEPS) -> pd.DataFrame:
+    """
+    Rank several prediction files against the same groundtruth, which is read and normalized once
+    Args:
+        predictions_files: list of paths to the predictions files, one per system
+        groundtruth_file: path to the groundtruth file
+        prediction_columns: list of column names in the predictions files
+        groundtruth_columns: list of column names in the groundtruth file, aligned with prediction_columns
+        id_column: optional column name present in all files used to pair the rows, rows are paired by position otherwise
+        workers: number of worker processes, 0 for all CPU cores
+        steps: list of normalization steps, see `normalization.NORMALIZATION_STEPS`
+    Returns:
+        leaderboard: pandas.DataFrame returned by `cer.evaluate_systems()`, the columns are named after the prediction columns
+    """
+    if len(prediction_columns) != len(groundtruth_columns):
+        raise ValueError("Number of prediction and groundtruth columns should be the same")
+    key_columns = [id_column] if id_column is not None else []
+    # The groundtruth columns take the names of the prediction columns they are compared to
+    groundtruth_df = cer.read_file(groundtruth_file, key_columns + groundtruth_columns, as_text=True).rename(columns=dict(zip(groundtruth_columns, prediction_columns)))
+    systems = {predictions_file: cer.read_file(predictions_file, key_columns + prediction_columns, as_text=True) for predictions_file in predictions_files}
+    return cer.evaluate_systems(systems, groundtruth_df, prediction_columns, id_column, steps, workers)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Calculate Character Error Rate (CER) between predictions and groundtruth')
-    parser.add_argument('--predictions', type=str, help='Path to the predictions file')
-    parser.add_argument('--groundtruth', type=str, help='Path to the groundtruth file')
-    parser.add_argument('--prediction_column', type=str, help='Column name in the predictions file')
-    parser.add_argument('--groundtruth_column', type=str, help='Column name in the groundtruth file')
+    parser.add_argument('--predictions', type=str, nargs='+', help='Path to the predictions file (.csv, .csv.gz, .xlsx, .parquet, .arrow, .feather, .ipc, .jsonl, .jsonl.gz), several files are ranked in a leaderboard')
+    parser.add_argument('--groundtruth', type=str, help='Path to the groundtruth file, in any of the predictions file formats')
+    parser.add_argument('--prediction_column', type=str, nargs='+', help='Column name in the predictions file, several columns are scored separately in a leaderboard')
+    parser.add_argument('--groundtruth_column', type=str, nargs='+', help='Column name in the groundtruth file, one per prediction column')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes, 0 for all CPU cores')
+    parser.add_argument('--chunk_size', type=int, default=100000, help='Number of rows read at a time when streaming')
+    parser.add_argument('--no_streaming', action='store_true', help='Load the whole files in memory instead of reading them in chunks')
+    parser.add_argument('--id_column', type=str, default=None, help='Column name in both files used to pair the rows, rows are paired by position by default')
+    parser.add_argument('--cache_dir', type=str, default=None, help='Directory of a cache of pair scores reused across runs')
+    parser.add_argument('--cache_size', type=int, default=1000000, help='Maximum number of pairs kept in the cache')
+    parser.add_argument('--state_file', type=str, default=None, help='Path to the per-row state of the previous run, only the added and changed rows are scored (requires --id_column)')
+    parser.add_argument('--normalization', type=str, nargs='+', default=normalization.DEFAULT_STEPS, choices=list(normalization.NORMALIZATION_STEPS), help='Normalization steps applied in order to the text')
+    parser.add_argument('--bootstrap', type=int, default=0, help='Number of bootstrap samples of the confidence interval of the CER, 0 to skip it')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the bootstrap intervals')
+    parser.add_argument('--compare_predictions', type=str, default=None, help='Path to a second predictions file compared to the first one with a paired bootstrap (requires --bootstrap)')
+    parser.add_argument('--compare_column', type=str, default=None, help='Column name in the second predictions file, --prediction_column by default')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the bootstrap resampling')
+    parser.add_argument('--confusions', type=str, default=None, help='Path to a .csv or .parquet file where the counts of the confused characters are written')
+    parser.add_argument('--top_confusions', type=int, default=20, help='Number of the most frequent confusions printed with --confusions')
+    parser.add_argument('--metrics', type=str, nargs='+', default=['cer'], choices=METRICS, help='Metrics computed from the same loaded and normalized pairs')
+    parser.add_argument('--tokenizer', type=str, default=tokenization.DEFAULT_TOKENIZER, choices=list(tokenization.TOKENIZERS), help='Tokenizer splitting the words of the WER, thai segments Thai text written without spaces')
     args = parser.parse_args()
+    if args.compare_predictions is not None and not args.bootstrap:
+        parser.error('--compare_predictions requires --bootstrap')
+    if args.bootstrap and args.state_file is not None:
+        parser.error('--bootstrap scores every row and can not be combined with --state_file')
+    if args.state_file is not None and (args.workers != 1 or args.cache_dir is not None):
+        parser.error('--state_file only scores the changed rows in the current process and can not be combined with --workers or --cache_dir')
+    if len(args.prediction_column) != len(args.groundtruth_column):
+        parser.error('--prediction_column and --groundtruth_column should have the same number of columns')
+    leaderboard = len(args.predictions) > 1 or len(args.prediction_column) > 1
+    if leaderboard and (args.bootstrap or args.state_file is not None or args.cache_dir is not None or args.confusions is not None):
+        parser.error('--bootstrap, --state_file, --cache_dir and --confusions only support one predictions file and column')
+    if args.confusions is not None and (args.bootstrap or args.state_file is not None or args.cache_dir is not None):
+        parser.error('--confusions aligns every pair and can not be combined with --bootstrap, --state_file or --cache_dir')
+    word_metrics = args.metrics != ['cer']
+    if word_metrics and (leaderboard or args.bootstrap or args.state_file is not None or args.confusions is not None):
+        parser.error('--metrics other than cer only support one predictions file and column and can not be combined with --bootstrap, --state_file or --confusions')
+    if leaderboard:
+        result = leaderboard_main(args.predictions, args.groundtruth, args.prediction_column, args.groundtruth_column, args.id_column, args.workers, args.normalization)
+        print(result.to_string(float_format=lambda value: f'{value:.6f}'))
+        sys.exit()
+    predictions_file, prediction_column, groundtruth_column = args.predictions[0], args.prediction_column[0], args.groundtruth_column[0]
     
-    cer = main(args.predictions, args.groundtruth, args.prediction_column, args.groundtruth_column)
-    print(f'CER: {cer}')
\ No newline at end of file
+    score_cache = cer.ScoreCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    try:
+        if args.confusions is not None:
+            cer_score, confusions = confusion_main(predictions_file, args.groundtruth, prediction_column, groundtruth_column, args.workers, not args.no_streaming, args.chunk_size, args.id_column, args.normalization)
+        elif word_metrics:
+            scores = metrics_main(predictions_file, args.groundtruth, prediction_column, groundtruth_column, args.metrics, args.tokenizer, args.workers, not args.no_streaming, args.chunk_size, args.id_column, score_cache, args.normalization)
+        elif args.bootstrap:
+            result = bootstrap_main(predictions_file, args.groundtruth, prediction_column, groundtruth_column, args.bootstrap, args.confidence, args.compare_predictions, args.compare_column, args.seed,
+                                    workers=args.workers, streaming=not args.no_streaming, chunk_size=args.chunk_size, id_column=args.id_column, cache=score_cache, steps=args.normalization)
+        else:
+            cer_score = main(predictions_file, args.groundtruth, prediction_column, groundtruth_column, args.workers, not args.no_streaming, args.chunk_size, args.id_column, score_cache, args.state_file, args.normalization)
+    finally:
+        if score_cache is not None:
+            stats = score_cache.stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, {stats['bypassed']} bypassed (shorter than {score_cache.min_length} characters), {stats['entries']} entries")
+            score_cache.close()
+    interval = f"{args.confidence:.0%} CI"
+    if word_metrics:
+        for metric, score in scores.items():
+            print(f'{metric.upper()}: {score}')
+    elif not args.bootstrap:
+        print(f'CER: {cer_score}')
+    elif args.compare_predictions is None:
+        print(f'CER: {result.cer} ({interval} {result.low:.6f} - {result.high:.6f})')
+    else:
+        print(f'CER {predictions_file}: {result.cer_a}')
+        print(f'CER {args.compare_predictions}: {result.cer_b}')
+        print(f'Difference: {result.difference:+.6f} ({interval} {result.low:+.6f} - {result.high:+.6f}), p-value: {result.p_value:.4f}')
+    if args.confusions is not None:
+        confusion.write_confusions(confusions, args.confusions)
+        top = confusion.top_confusions(confusions, args.top_confusions)
+        for column in ['reference', 'hypothesis']:
+            top[column] = top[column].map(confusion.describe_character)
+        print(f"Most frequent confusions (all counts in {args.confusions}):")
+        print(top.to_string(index=False, float_format=lambda value: f'{value:.2%}'))
@@ -0,0 +1,125 @@
+####################################################################################################
+# Description: Lightweight client of the CER scoring server (`server.py`).
+# Only the standard library is imported, neither pandas nor the scoring engine, so that a training job
+# starts fast and only pays a local HTTP round trip per evaluation. All the requests of a client are
+# sent over one kept-alive connection.
+# Usage:
+#     from cer_tools.client import ScoringClient
+#     with ScoringClient(port=8765) as client:
+#         score = client.cer(predictions, groundtruth)
+####################################################################################################
+
+import http.client
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+class ScoringError(Exception):
+    """
+    Error returned by the scoring server for a request
+    """
+
+class ScoringClient:
+    """
+    Client of the /score, /metrics and /health endpoints of the scoring server
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: Optional[float] = 60.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection: Optional[http.client.HTTPConnection] = None
+        self.response: Optional[http.client.HTTPResponse] = None
+
+    def __enter__(self) -> 'ScoringClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None, content_type: str = 'application/json') -> http.client.HTTPResponse:
+        # A streamed response that was not read to the end leaves the connection unusable
+        if self.response is not None and not self.response.isclosed():
+            self.close()
+        # The connection is reopened once if the server closed it since the previous request
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=body, headers={'Content-Type': content_type})
+                self.response = self.connection.getresponse()
+                return self.response
+            except (ConnectionError, http.client.BadStatusLine):
+                self.close()
+                if attempt:
+                    raise
+
+    def _get_json(self, path: str) -> Dict[str, Any]:
+        response = self._request('GET', path)
+        content = json.loads(response.read())
+        if response.status != 200:
+            raise ScoringError(content.get('error', response.reason))
+        return content
+
+    def score_many(self, requests: Iterable[Tuple[Any, List[str], List[str]]]) -> Iterator[Dict[str, Any]]:
+        """
+        Score several requests in one call, the server batches them with the requests of the other clients
+        Args:
+            requests: iterable of (id, hypotheses, references), id is any JSON value returned with the result
+        Returns:
+            results: iterator of dicts with the keys 'id', 'cer', 'errors' and 'reference_length' (or 'error'),
+                in the order of the requests, each yielded as soon as the server streams it
+        """
+        lines = [json.dumps({'id': request_id, 'hypotheses': list(hypotheses), 'references': list(references)}) for request_id, hypotheses, references in requests]
+        response = self._request('POST', '/score', ('\n'.join(lines) + '\n').encode('utf-8'), 'application/x-ndjson')
+        if response.status != 200:
+            content = json.loads(response.read())
+            raise ScoringError(content.get('error', response.reason))
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            yield json.loads(line)
+
+    def errors(self, hypotheses: List[str], references: List[str]) -> Tuple[int, int]:
+        """
+        Summed edit distance and reference length of the pairs with a non-empty reference, whose ratio is the CER
+        """
+        result, = self.score_many([(None, hypotheses, references)])
+        if 'error' in result:
+            raise ScoringError(result['error'])
+        return result['errors'], result['reference_length']
+
+    def cer(self, hypotheses: List[str], references: List[str]) -> float:
+        """
+        Compute Character Error Rate (CER) between hypotheses and references on the server, same result as `cer.cer()`
+        Args:
+            hypotheses: list of strings
+            references: list of strings
+        Returns:
+            cer: float
+        """
+        errors, reference_length = self.errors(hypotheses, references)
+        # If no valid pairs remain, return 1.0 (100% error rate)
+        return errors / reference_length if reference_length else 1.0
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Latency and throughput metrics of the server, see `server.ServerMetrics.snapshot()`
+        """
+        return self._get_json('/metrics')
+
+    def health(self) -> bool:
+        """
+        Whether the server is up
+        """
+        try:
+            return self._get_json('/health').get('status') == 'ok'
+        except (OSError, ScoringError):
+            return False
@@ -0,0 +1,78 @@
+####################################################################################################
+# Description: Reports of the character confusions counted by `cer.alignment_counts()`.
+# The confusions are a Counter keyed by (reference character, hypothesis character), where '' is
+# the missing side of a deletion or an insertion. Counters of different chunks, columns or worker
+# processes are merged by summing them, e.g. `counter.update(other)`.
+####################################################################################################
+
+from collections import Counter
+import unicodedata
+import pandas as pd
+
+# Columns of the table returned by `confusion_table()`
+CONFUSION_COLUMNS = ['operation', 'reference', 'hypothesis', 'count']
+
+def _operation(reference: str, hypothesis: str) -> str:
+    if not reference:
+        return 'insertion'
+    if not hypothesis:
+        return 'deletion'
+    return 'substitution'
+
+def confusion_table(confusions: Counter) -> pd.DataFrame:
+    """
+    Convert the confusion counts to a table, most frequent first
+    Args:
+        confusions: Counter of (reference character, hypothesis character) edits
+    Returns:
+        table: pandas.DataFrame with the columns in `CONFUSION_COLUMNS`
+    """
+    rows = [(_operation(reference, hypothesis), reference, hypothesis, count) for (reference, hypothesis), count in confusions.items()]
+    table = pd.DataFrame(rows, columns=CONFUSION_COLUMNS)
+    return table.sort_values(['count', 'reference', 'hypothesis'], ascending=[False, True, True], ignore_index=True)
+
+def top_confusions(confusions: Counter, top: int = 20) -> pd.DataFrame:
+    """
+    The most frequent confusions with their share of all the edits
+    Args:
+        confusions: Counter of (reference character, hypothesis character) edits
+        top: number of confusions
+    Returns:
+        table: pandas.DataFrame with the columns in `CONFUSION_COLUMNS` and the 'share' of the edits
+    """
+    table = confusion_table(confusions)
+    total = table['count'].sum()
+    table = table.head(top).copy()
+    table['share'] = table['count'] / total if total else 0.0
+    return table
+
+def write_confusions(confusions: Counter, file_path: str) -> None:
+    """
+    Write all the confusion counts to a CSV or Parquet file, depending on the extension of file_path
+    Args:
+        confusions: Counter of (reference character, hypothesis character) edits
+        file_path: path ending with .csv or .parquet
+    """
+    table = confusion_table(confusions)
+    if file_path.lower().endswith('.parquet'):
+        table.to_parquet(file_path, index=False)
+    elif file_path.lower().endswith('.csv'):
+        table.to_csv(file_path, index=False)
+    else:
+        raise ValueError("Only .csv and .parquet files are supported")
+
+def describe_character(character: str) -> str:
+    """
+    Printable form of a confused character, combining marks such as Thai tone marks are shown on a dotted circle
+    Args:
+        character: one character or '' for the missing side
+    Returns:
+        text: string
+    """
+    if not character:
+        return '\u2205'  # Empty set sign
+    if unicodedata.category(character) in ('Mn', 'Me'):
+        return '\u25cc' + character  # Dotted circle
+    if character.isspace():
+        return repr(character)
+    return character
@@ -0,0 +1,88 @@
+####################################################################################################
+# Description: Edit distance engine used by `cer.cer()`.
+# The distances are computed by rapidfuzz, which is also what jiwer uses, with its bit-parallel
+# implementations of the algorithm of Myers (1999) and Hyyrö (2001) in C++. A batch of pairs is scored
+# in a single call, without a Python loop over the pairs.
+# Both return the Levenshtein distance, i.e. the S + D + I total reported by jiwer.
+# When the split into substitutions, deletions and insertions is needed, the edit operations are taken from
+# rapidfuzz as well, so that the three counts are the same as jiwer's.
+####################################################################################################
+
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.process import cpdist
+
+def levenshtein(hypothesis: str, reference: str, max_distance: Optional[int] = None) -> int:
+    """
+    Compute the Levenshtein distance (substitutions + deletions + insertions) between two strings
+    Args:
+        hypothesis: string
+        reference: string
+        max_distance: optional int, when given the computation stops once the distance exceeds it
+            and any distance above it is reported as max_distance + 1
+    Returns:
+        distance: int
+    """
+    return Levenshtein.distance(hypothesis, reference, score_cutoff=max_distance)
+
+def levenshtein_batch(hypotheses: Sequence[str], references: Sequence[str], max_distance: Optional[int] = None) -> np.ndarray:
+    """
+    Compute the Levenshtein distance of every hypothesis/reference pair in one call
+    Args:
+        hypotheses: list of strings, or of tuples of tokens
+        references: list of strings, or of tuples of tokens
+        max_distance: optional int, distances above it are reported as max_distance + 1
+    Returns:
+        distances: numpy.ndarray of int64, one per pair
+    """
+    if len(hypotheses) != len(references):
+        raise ValueError("Number of hypotheses and references should be the same")
+    if not len(references):
+        return np.zeros(0, dtype=np.int64)
+    return cpdist(hypotheses, references, scorer=Levenshtein.distance, score_cutoff=max_distance, dtype=np.int64)
+
+def _record_confusions(confusions: Counter, hyp: str, ref: str, operations: List[Tuple[str, int, int]]) -> None:
+    """
+    Count the (reference character, hypothesis character) pair of every edit, '' stands for the missing side
+    """
+    for tag, ref_position, hyp_position in operations:
+        if tag == 'replace':
+            confusions[ref[ref_position], hyp[hyp_position]] += 1
+        elif tag == 'delete':
+            confusions[ref[ref_position], ''] += 1
+        else:
+            confusions['', hyp[hyp_position]] += 1
+
+def edit_operations_batch(hypotheses: Sequence[str], references: Sequence[str], confusions: Optional[Counter] = None) -> np.ndarray:
+    """
+    Count the substitutions, deletions and insertions turning each reference into its hypothesis
+    Args:
+        hypotheses: list of strings
+        references: list of strings
+        confusions: optional Counter updated in the same pass with the edited character pairs, keyed by
+            (reference character, hypothesis character) with '' for the missing side of deletions and insertions.
+            Pairs with an empty reference are not counted, as they are ignored by the CER
+    Returns:
+        operations: numpy.ndarray of int64 of shape (number of pairs, 3), columns are substitutions, deletions and insertions
+    """
+    if len(hypotheses) != len(references):
+        raise ValueError("Number of hypotheses and references should be the same")
+    operations = np.zeros((len(references), 3), dtype=np.int64)
+    for index, (hyp, ref) in enumerate(zip(hypotheses, references)):
+        if hyp == ref:
+            continue
+        if not ref:
+            operations[index, 2] = len(hyp)
+        elif not hyp:
+            operations[index, 1] = len(ref)
+            if confusions is not None:
+                confusions.update((character, '') for character in ref)
+        else:
+            pair_operations = Levenshtein.editops(ref, hyp).as_list()
+            tags = [operation[0] for operation in pair_operations]
+            operations[index] = tags.count('replace'), tags.count('delete'), tags.count('insert')
+            if confusions is not None:
+                _record_confusions(confusions, hyp, ref, pair_operations)
+    return operations
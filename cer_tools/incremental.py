@@ -0,0 +1,107 @@
+####################################################################################################
+# Description: Incremental CER evaluation of files that change between runs.
+# The edit distance and a fingerprint of every row are stored in a state file, keyed by the row ID.
+# On the next run only the rows that were added or whose prediction or groundtruth changed are
+# scored again, the other rows reuse their stored counts. Removed rows are dropped from the state.
+# The result is the same as scoring every row again.
+####################################################################################################
+
+from typing import Any, List, NamedTuple, Tuple
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from . import distance
+    from .cache import keys_for_pairs
+except ImportError:
+    # Imported as a top-level module by the scripts in this directory
+    import distance
+    from cache import keys_for_pairs
+
+# Columns of the state, indexed by the row ID
+STATE_COLUMNS = ['fingerprint', 'errors', 'reference_length']
+
+class IncrementalReport(NamedTuple):
+    """
+    Number of rows of each kind found by `incremental_cer()` compared to the previous run
+    """
+    added: int
+    changed: int
+    removed: int
+    unchanged: int
+
+def load_state(state_path: str) -> pd.DataFrame:
+    """
+    Load the state written by the previous run, empty if there is none
+    Args:
+        state_path: path to the state file
+    Returns:
+        state: pandas.DataFrame indexed by row ID with the columns in `STATE_COLUMNS`
+    """
+    if not os.path.exists(state_path):
+        return pd.DataFrame({
+            'fingerprint': pd.Series(dtype=object),
+            'errors': pd.Series(dtype=np.int64),
+            'reference_length': pd.Series(dtype=np.int64),
+        })
+    return pd.read_pickle(state_path)
+
+def save_state(state: pd.DataFrame, state_path: str) -> None:
+    """
+    Write the state, replacing the previous one only once it is completely written
+    Args:
+        state: pandas.DataFrame indexed by row ID with the columns in `STATE_COLUMNS`
+        state_path: path to the state file
+    """
+    temporary_path = state_path + '.tmp'
+    state.to_pickle(temporary_path)
+    os.replace(temporary_path, state_path)
+
+def incremental_cer(keys: List[Any], hypotheses: List[str], references: List[str], state_path: str) -> Tuple[float, IncrementalReport]:
+    """
+    Compute Character Error Rate (CER), only scoring the rows that changed since the previous run with the same state file
+    Args:
+        keys: list of unique row IDs
+        hypotheses: list of strings
+        references: list of strings, rows with an empty reference are ignored as in `cer.cer()`
+        state_path: path to the state file, created if missing and updated with the current rows
+    Returns:
+        cer: float
+        report: IncrementalReport
+    """
+    if not len(keys) == len(hypotheses) == len(references):
+        raise ValueError("Number of keys, hypotheses and references should be the same")
+    index = pd.Index(keys)
+    if not index.is_unique:
+        raise ValueError("Keys should be unique")
+    # Same preprocessing as the default CER transformation of jiwer
+    hypotheses = [hyp.strip() for hyp in hypotheses]
+    references = [ref.strip() for ref in references]
+    fingerprints = keys_for_pairs(hypotheses, references)
+
+    previous = load_state(state_path)
+    known = index.isin(previous.index)
+    removed = len(previous) - int(known.sum())
+    previous = previous.reindex(index)
+    previous_fingerprints = previous['fingerprint'].tolist()
+    stale = [position for position, (old, new) in enumerate(zip(previous_fingerprints, fingerprints)) if old != new]
+
+    errors = previous['errors'].fillna(0).to_numpy(dtype=np.int64)
+    errors[stale] = distance.levenshtein_batch([hypotheses[position] for position in stale], [references[position] for position in stale])
+    reference_length = np.fromiter((len(ref) for ref in references), dtype=np.int64, count=len(references))
+    # Object dtype so that the missing rows of the next run do not turn the 64-bit fingerprints into floats
+    save_state(pd.DataFrame({'fingerprint': pd.Series(fingerprints, dtype=object, index=index), 'errors': errors, 'reference_length': reference_length}, index=index), state_path)
+
+    added = int((~known).sum())
+    report = IncrementalReport(
+        added=added,
+        changed=len(stale) - added,
+        removed=removed,
+        unchanged=len(keys) - len(stale),
+    )
+    valid = reference_length > 0
+    # If no valid pairs remain, return 1.0 (100% error rate)
+    if not valid.any():
+        return 1.0, report
+    return int(errors[valid].sum()) / int(reference_length[valid].sum()), report
@@ -2,17 +2,191 @@
 # This file contains the main UI application for the CER tools.
 # It uses the PyQt6 library for the GUI and the functions in the `cer` module for CER calculation.
 # The application allows the user to upload the predictions and groundtruth files and specify the columns.
-# The application also displays the top 5 rows of the predictions and groundtruth files.
-# The application allows the user to sort the predictions and groundtruth files by the specified columns.
+# The application also displays the predictions and groundtruth files in tables that only render the visible rows,
+# so that files of millions of rows can be scrolled and sorted by any column by clicking its header.
+# Once the CER is calculated, the rows are highlighted by their CER.
 # The application calculates the CER between the predictions and groundtruth and displays the result when the user clicks the "Calculate CER" button.
+# The WER is calculated in the same pass, with the words split by the selected tokenizer (e.g. thai for Thai text written without spaces).
+# The rows of the two files are paired by the key in their first column.
+# Loading the files and calculating the CER run in a thread pool so that the window stays responsive,
+# the progress is shown in a progress bar and the calculation can be cancelled. The loading of a file is a single
+# read that can not be interrupted, if it fails the previously loaded file is shown again.
 ###############################################################################
 
 import sys
-from typing import List
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog, QTableWidget, QTableWidgetItem, QLineEdit, QComboBox
-from PyQt6.QtCore import Qt
+from collections import Counter
+from typing import Any, Callable, Optional, Tuple
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog, QTableView, QLineEdit, QComboBox, QProgressBar, QTabWidget
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+from PyQt6.QtGui import QColor
+import numpy as np
 import pandas as pd
-import cer
+
+try:
+    from . import cer, confusion, tokenization
+except ImportError:
+    # Imported as a top-level module by the scripts in this directory
+    import cer
+    import confusion
+    import tokenization
+
+# File dialog filter of the formats supported by `cer.read_file()`
+FILE_FILTER = "Data Files (*.csv *.csv.gz *.xlsx *.parquet *.arrow *.feather *.ipc *.jsonl *.jsonl.gz);;All Files (*)"
+# Number of rows scored between two progress updates and cancellation checks
+PROGRESS_BLOCK_SIZE = 20000
+# Number of the most frequent confusions shown in the Confusions tab
+TOP_CONFUSIONS = 100
+
+class DataFrameModel(QAbstractTableModel):
+    """
+    Table model reading the cells of a DataFrame only when the view displays them.
+    Sorting keeps the DataFrame untouched and only reorders the positions of its rows.
+    """
+    def __init__(self, data: pd.DataFrame, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.dataframe = data
+        # One array per column, indexing them is much cheaper than `data.iloc[row, column]`
+        self.columns = [data[column].to_numpy() for column in data.columns]
+        self.order = None  # Positions of the rows in display order, None for the file order
+        self.row_cer = None  # CER of every row, aligned with data
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.dataframe)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def row_position(self, row: int) -> int:
+        """Position in the DataFrame of the row displayed at `row`."""
+        return row if self.order is None else int(self.order[row])
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        position = self.row_position(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.columns[index.column()][position]
+            # Missing values are shown empty rather than "nan"
+            return '' if pd.isna(value) else str(value)
+        if self.row_cer is not None and not np.isnan(self.row_cer[position]):
+            if role == Qt.ItemDataRole.BackgroundRole and self.row_cer[position] > 0:
+                # The more errors, the redder the row
+                return QColor(255, 0, 0, int(40 + 160 * min(1.0, self.row_cer[position])))
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return f"Row CER: {self.row_cer[position]*100.00:.2f}%"
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return str(self.dataframe.columns[section])
+        return str(self.row_position(section) + 1)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        if column < 0:
+            self.order = None
+        else:
+            # Only the sorted column is copied, missing values go last in both orders
+            values = pd.Series(self.columns[column])
+            self.order = values.sort_values(ascending=order == Qt.SortOrder.AscendingOrder, kind='stable', na_position='last').index.to_numpy()
+        self.layoutChanged.emit()
+
+    def set_row_cer(self, row_cer: Optional[np.ndarray]):
+        """Highlight the rows by their CER, NaN for the rows that were not scored."""
+        self.row_cer = row_cer
+        if len(self.dataframe) and len(self.columns):
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.dataframe) - 1, len(self.columns) - 1))
+
+def row_cer_by_key(edit_counts: pd.DataFrame, keys: pd.Series) -> pd.Series:
+    """CER of every row over all the scored columns, indexed by the key of the row, NaN when all its references are empty."""
+    totals = edit_counts.groupby('row')[cer.EDIT_COUNT_COLUMNS].sum()
+    errors = totals['substitutions'] + totals['deletions'] + totals['insertions']
+    row_cer = (errors / totals['reference_length'].where(totals['reference_length'] > 0)).to_numpy()
+    return pd.Series(row_cer, index=keys.to_numpy()[totals.index.to_numpy()])
+
+class TaskCancelled(Exception):
+    """Raised inside a task when the user cancelled it."""
+
+class TaskSignals(QObject):
+    """Signals sent by a Task to the main thread."""
+    progress = pyqtSignal(int, str)
+    partial = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class Task(QRunnable):
+    """
+    Run function(task, *args) in the thread pool and report its result through signals.
+    The function sends intermediate results with `task.signals` and calls `task.check_cancelled()` regularly.
+    """
+    def __init__(self, function: Callable, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+        self.is_cancelled = False
+        # Whether the function checks for cancellation often enough for the Cancel button to stop it
+        self.cancellable = True
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def check_cancelled(self):
+        if self.is_cancelled:
+            raise TaskCancelled()
+
+    def run(self):
+        try:
+            result = self.function(self, *self.args)
+            self.check_cancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+        else:
+            self.signals.finished.emit(result)
+
+def load_file(task: Task, filepath: str) -> pd.DataFrame:
+    """Read the first rows for the preview, then the whole file as string, in one call that can not be cancelled."""
+    task.signals.progress.emit(0, "Reading the first rows")
+    task.signals.partial.emit(cer.read_head(filepath))
+    task.signals.progress.emit(50, "Reading the whole file")
+    # Missing values stay missing, the table shows them empty and the normalization turns them into empty strings
+    return cer.read_file(filepath, as_text=True)
+
+def compute_edit_counts(task: Task, pred_data: pd.DataFrame, gt_data: pd.DataFrame, tokenizer: Optional[str] = None) -> Tuple[pd.DataFrame, Counter, cer.JoinReport, pd.Series]:
+    """Pair the rows by key, then count the edits, the confused characters and, with a tokenizer, the word edits column by column, sending the CER and WER of each column once it is done."""
+    # Pair the rows by the key in the first column of each file rather than by position
+    task.signals.progress.emit(0, "Matching the keys")
+    pred_data, gt_data, report = cer.join_on_key(pred_data, gt_data)
+    if len(pred_data) == 0:
+        raise ValueError("No matched keys in the first column!")
+    matched_columns = cer.get_matched_columns(pred_data, gt_data)
+    # Check if any matched_column neither in pred_data nor in gt_data
+    if not matched_columns:
+        raise ValueError("No matched columns!")
+
+    confusions = Counter()
+    total_blocks = len(matched_columns) * max(1, -(-len(pred_data) // PROGRESS_BLOCK_SIZE))
+    done_blocks = 0
+    counts = []
+    for matched_column in matched_columns:
+        column_counts = []
+        for start in range(0, len(pred_data), PROGRESS_BLOCK_SIZE):
+            task.check_cancelled()
+            block_counts = cer.column_edit_counts(pred_data.iloc[start:start + PROGRESS_BLOCK_SIZE], gt_data.iloc[start:start + PROGRESS_BLOCK_SIZE], [matched_column], confusions=confusions, tokenizer=tokenizer)
+            block_counts['row'] += start
+            column_counts.append(block_counts)
+            done_blocks += 1
+            task.signals.progress.emit(100 * done_blocks // total_blocks, f"Scoring {matched_column}")
+        column_counts = pd.concat(column_counts, ignore_index=True)
+        column_wer = cer.wer_from_counts(column_counts) if tokenizer is not None else None
+        task.signals.partial.emit((matched_column, cer.cer_from_counts(column_counts), column_wer))
+        counts.append(column_counts)
+    return pd.concat(counts, ignore_index=True), confusions, report, pred_data.iloc[:, 0]
 
 class CERApp(QMainWindow):
     def __init__(self):
@@ -72,12 +246,30 @@ class CERApp(QMainWindow):
         sorting_button_layout.addWidget(self.sort_button)
 
         # Table Previews
-        self.pred_table = QTableWidget()
-        self.gt_table = QTableWidget()
-        layout.addWidget(QLabel("Predictions Preview:"))
-        layout.addWidget(self.pred_table)
-        layout.addWidget(QLabel("Groundtruth Preview:"))
-        layout.addWidget(self.gt_table)
+        self.tabs = QTabWidget()
+        data_tab = QWidget()
+        data_layout = QVBoxLayout()
+        self.pred_table = self.create_table_view()
+        self.gt_table = self.create_table_view()
+        data_layout.addWidget(QLabel("Predictions Preview:"))
+        data_layout.addWidget(self.pred_table)
+        data_layout.addWidget(QLabel("Groundtruth Preview:"))
+        data_layout.addWidget(self.gt_table)
+        data_tab.setLayout(data_layout)
+        self.tabs.addTab(data_tab, "Data")
+
+        # Most frequent character confusions of the last calculation, all counts can be exported
+        confusions_tab = QWidget()
+        confusions_layout = QVBoxLayout()
+        self.confusions_table = self.create_table_view()
+        self.export_confusions_button = QPushButton("Export Confusions")
+        self.export_confusions_button.clicked.connect(self.export_confusions)
+        self.export_confusions_button.setEnabled(False)  # Enabled once the CER is calculated
+        confusions_layout.addWidget(self.confusions_table)
+        confusions_layout.addWidget(self.export_confusions_button)
+        confusions_tab.setLayout(confusions_layout)
+        self.tabs.addTab(confusions_tab, "Confusions")
+        layout.addWidget(self.tabs)
 
         # Select Column Inputs for CER Calculation
         # User can specify the column to calculate CER separately for predictions and groundtruth
@@ -95,157 +287,218 @@ class CERApp(QMainWindow):
         calculation_column_layout.addWidget(self.gt_calculation_column_label)
         calculation_column_layout.addWidget(self.gt_calculation_column_dropdown)
 
+        # Tokenizer of the WER calculated with the CER, "None" only calculates the CER
+        self.tokenizer_label = QLabel("WER Tokenizer:")
+        self.tokenizer_dropdown = QComboBox()
+        self.tokenizer_dropdown.addItem("None", None)
+        for name in tokenization.TOKENIZERS:
+            self.tokenizer_dropdown.addItem(name, name)
+        self.tokenizer_dropdown.setCurrentIndex(self.tokenizer_dropdown.findData(tokenization.DEFAULT_TOKENIZER))
+        calculation_column_layout.addWidget(self.tokenizer_label)
+        calculation_column_layout.addWidget(self.tokenizer_dropdown)
+
         # Buttons for Calculation
         button_layout = QHBoxLayout()
         self.calculate_button = QPushButton("Calculate CER")
         self.calculate_button.clicked.connect(self.calculate_cer)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_tasks)
+        self.cancel_button.setEnabled(False)  # Enabled while a task is running
         self.result_label = QLabel("CER Result: N/A")
         button_layout.addWidget(self.calculate_button)
+        button_layout.addWidget(self.cancel_button)
         button_layout.addWidget(self.result_label)
         layout.addLayout(button_layout)
 
+        # Progress of the running tasks and CER of each column as soon as it is computed
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.status_label = QLabel("")
+        self.column_results_label = QLabel("")
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.column_results_label)
+
+        # Tasks running in the thread pool, kept so that they can be cancelled
+        # Several threads even on a single core, so that a file preview is not queued behind the loading of another file
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max(4, QThread.idealThreadCount()))
+        self.tasks = set()
+
         self.central_widget.setLayout(layout)
 
     def load_predictions(self):
-        # Load CSV or Excel file
-        filepath, _ = QFileDialog.getOpenFileName(self, "Open Predictions File", "", "Spreadsheet Files (*.csv *.xlsx)")
+        # Load a CSV, Excel, Parquet, Arrow or JSON lines file
+        filepath, _ = QFileDialog.getOpenFileName(self, "Open Predictions File", "", FILE_FILTER)
         if filepath:
-            self.pred_file_input.setText(filepath)
-            with open(filepath, "rb") as f:
-                if filepath.endswith('.xlsx'):
-                    self.pred_data = pd.read_excel(f)
-                else:
-                    self.pred_data = pd.read_csv(f)
-            # Convert all columns to string
-            self.pred_data = self.pred_data.astype(str)
-            # Do not convert empty strings to NaN
-            self.pred_data = self.pred_data.fillna('')
-            # Automatically sort the data by the first column
-            self.pred_data = self.pred_data.sort_values(by=self.pred_data.columns[0])
-            # Load the columns into the comboboxes
-            self.pred_sorting_column_dropdown.setEnabled(True)
-            self.pred_sorting_column_dropdown.clear()
-            self.pred_sorting_column_dropdown.addItems(self.pred_data.columns)
-            self.pred_calculation_column_dropdown.setEnabled(True)
-            self.pred_calculation_column_dropdown.clear()
-            self.pred_calculation_column_dropdown.addItems(self.pred_data.columns)
-            # replace "nan" with empty string
-            pred_data = self.pred_data.replace('nan', '')
-            self.display_data(pred_data, self.pred_table)
+            self.start_loading(filepath, self.pred_file_input, self.pred_table, 'pred_data', self.set_predictions)
+
+    def set_predictions(self, data):
+        self.pred_data = data
+        # The whole file replaces the preview of its first rows
+        self.display_data(self.pred_data, self.pred_table)
+        # Load the columns into the comboboxes
+        self.pred_sorting_column_dropdown.setEnabled(True)
+        self.pred_sorting_column_dropdown.clear()
+        self.pred_sorting_column_dropdown.addItems(self.pred_data.columns)
+        self.pred_calculation_column_dropdown.setEnabled(True)
+        self.pred_calculation_column_dropdown.clear()
+        self.pred_calculation_column_dropdown.addItems(self.pred_data.columns)
 
     def load_groundtruth(self):
-        filepath, _ = QFileDialog.getOpenFileName(self, "Open Groundtruth File", "", "Spreadsheet Files (*.csv *.xlsx)")
+        filepath, _ = QFileDialog.getOpenFileName(self, "Open Groundtruth File", "", FILE_FILTER)
+        if filepath:
+            self.start_loading(filepath, self.gt_file_input, self.gt_table, 'gt_data', self.set_groundtruth)
+
+    def set_groundtruth(self, data):
+        self.gt_data = data
+        # The whole file replaces the preview of its first rows
+        self.display_data(self.gt_data, self.gt_table)
+        # Load the columns into the comboboxes
+        self.gt_sorting_column_dropdown.setEnabled(True)
+        self.gt_sorting_column_dropdown.clear()
+        self.gt_sorting_column_dropdown.addItems(self.gt_data.columns)
+        self.gt_calculation_column_dropdown.setEnabled(True)
+        self.gt_calculation_column_dropdown.clear()
+        self.gt_calculation_column_dropdown.addItems(self.gt_data.columns)
+
+    def start_loading(self, filepath, file_input, table_view, data_attribute, set_data):
+        """Load a file in the thread pool, previewing its first rows, the previous file is shown again if the load fails."""
+        previous_path = file_input.text()
+        file_input.setText(filepath)
+        # Reading a file is a single call that does not check for cancellation
+        task = Task(load_file, filepath)
+        task.cancellable = False
+        task.signals.partial.connect(lambda head: self.display_data(head, table_view))
+        task.signals.finished.connect(set_data)
+        task.signals.failed.connect(lambda message: self.restore_data(previous_path, file_input, table_view, data_attribute))
+        # The loaded data would not match the new preview until the load is done
+        self.calculate_button.setEnabled(False)
+        self.start_task(task)
+
+    def restore_data(self, previous_path, file_input, table_view, data_attribute):
+        """Show the file whose data is still loaded again, or nothing if no file was loaded."""
+        file_input.setText(previous_path if hasattr(self, data_attribute) else "")
+        if hasattr(self, data_attribute):
+            self.display_data(getattr(self, data_attribute), table_view)
+        else:
+            table_view.setModel(None)
+
+    def start_task(self, task):
+        """Run a task in the thread pool and show its progress."""
+        task.signals.progress.connect(self.show_progress)
+        task.signals.failed.connect(lambda message: self.status_label.setText(f"Error: {message}"))
+        task.signals.cancelled.connect(lambda: self.status_label.setText("Cancelled"))
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(lambda *_, task=task: self.end_task(task))
+        self.tasks.add(task)
+        self.cancel_button.setEnabled(any(task.cancellable for task in self.tasks))
+        self.thread_pool.start(task)
+
+    def end_task(self, task):
+        self.tasks.discard(task)
+        self.cancel_button.setEnabled(any(task.cancellable for task in self.tasks))
+        if not self.tasks:
+            self.calculate_button.setEnabled(True)
+            self.progress_bar.setValue(self.progress_bar.maximum())
+            if self.status_label.text().startswith(("Reading", "Scoring")):
+                self.status_label.setText("Done")
+
+    def show_progress(self, value, message):
+        self.progress_bar.setValue(value)
+        self.status_label.setText(message)
+
+    def cancel_tasks(self):
+        """Ask the running tasks to stop, their results are discarded."""
+        for task in self.tasks:
+            if task.cancellable:
+                task.cancel()
+
+    def create_table_view(self):
+        """Table view sorted by clicking on a column header."""
+        table_view = QTableView()
+        table_view.setSortingEnabled(True)
+        # The file order is kept until a header is clicked
+        table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        return table_view
+
+    def display_data(self, data, table_view):
+        """Display a DataFrame in a QTableView, only the visible cells are rendered."""
+        table_view.setModel(DataFrameModel(data, table_view))
+        table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+
+    def export_confusions(self):
+        """Save the counts of all the confused characters to a CSV or Parquet file."""
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Confusions", "confusions.csv", "CSV Files (*.csv);;Parquet Files (*.parquet)")
         if filepath:
-            self.gt_file_input.setText(filepath)
-            with open(filepath, "rb") as f:
-                if filepath.endswith('.xlsx'):
-                    self.gt_data = pd.read_excel(f)
-                else:
-                    self.gt_data = pd.read_csv(f)
-            # Convert all columns to string
-            self.gt_data = self.gt_data.astype(str)
-            # Do not convert empty strings to NaN
-            self.gt_data = self.gt_data.fillna('')
-            # Automatically sort the data by the first column
-            self.gt_data = self.gt_data.sort_values(by=self.gt_data.columns[0])
-            # Load the columns into the comboboxes
-            self.gt_sorting_column_dropdown.setEnabled(True)
-            self.gt_sorting_column_dropdown.clear()
-            self.gt_sorting_column_dropdown.addItems(self.gt_data.columns)
-            self.gt_calculation_column_dropdown.setEnabled(True)
-            self.gt_calculation_column_dropdown.clear()
-            self.gt_calculation_column_dropdown.addItems(self.gt_data.columns)
-            # replace "nan" with empty string
-            gt_data = self.gt_data.replace('nan', '')
-            self.display_data(gt_data, self.gt_table)
-
-    def display_data(self, data, table_widget):
-        """Display the top 5 rows of a DataFrame in a QTableWidget."""
-        table_widget.clear()
-        table_widget.setRowCount(5)
-        table_widget.setColumnCount(len(data.columns))
-        table_widget.setHorizontalHeaderLabels(data.columns)
-
-        for i in range(min(5, len(data))):
-            for j, column in enumerate(data.columns):
-                table_widget.setItem(i, j, QTableWidgetItem(str(data.iloc[i, j])))
+            try:
+                confusion.write_confusions(self.confusions, filepath)
+            except (ValueError, ImportError) as error:
+                self.status_label.setText(f"Error: {error}")
 
     def sort_data(self):
-        """Sort both predictions and groundtruth data by the specified columns."""
+        """Sort both predictions and groundtruth tables by the specified columns."""
         pred_sorting_column = self.pred_sorting_column_dropdown.currentText()
         gt_sorting_column = self.gt_sorting_column_dropdown.currentText()
 
         if hasattr(self, 'pred_data') and pred_sorting_column in self.pred_data.columns:
-            self.pred_data = self.pred_data.sort_values(by=pred_sorting_column)
-            self.display_data(self.pred_data, self.pred_table)
+            self.pred_table.sortByColumn(self.pred_data.columns.get_loc(pred_sorting_column), Qt.SortOrder.AscendingOrder)
 
         if hasattr(self, 'gt_data') and gt_sorting_column in self.gt_data.columns:
-            self.gt_data = self.gt_data.sort_values(by=gt_sorting_column)
-            self.display_data(self.gt_data, self.gt_table)
+            self.gt_table.sortByColumn(self.gt_data.columns.get_loc(gt_sorting_column), Qt.SortOrder.AscendingOrder)
 
     def calculate_cer(self):
-        """Calculate the CER and display the result."""
+        """Calculate the CER in the thread pool and display the result."""
         
         if not (hasattr(self, 'pred_data') and hasattr(self, 'gt_data')):
             self.result_label.setText("CER Result: Load both files first!")
             return
 
-        matched_columns = cer.get_matched_columns(self.pred_data, self.gt_data)
-        # Check if any matched_column neither in pred_data nor in gt_data
-        if not matched_columns:
-            self.result_label.setText("CER Result: No matched columns!")
-            return
-        
-        result_texts = []
-        # Calculate CER for each matched column
-        for matched_column in matched_columns:
-            result_text = ""
-            predictions = cer.get_column_to_list(self.pred_data, matched_column)
-            groundtruth = cer.get_column_to_list(self.gt_data, matched_column)
-            # Process each element in predictions and groundtruth
-            predictions = [cer.process_text(pred) for pred in predictions]
-            groundtruth = [cer.process_text(gt) for gt in groundtruth]
-            # Ensure both lists have the same length
-            if len(predictions) != len(groundtruth):
-                result_text = f"{matched_column}: Mismatched row counts!"
-                pass
-            # Ensure that each element in predictions and groundtruth is a string
-            elif not all(isinstance(pred, str) for pred in predictions):
-                result_text = f"{matched_column}: All predictions should be strings!"
-                pass
-            elif not all(isinstance(gt, str) for gt in groundtruth):
-                result_text = f"{matched_column}: All groundtruth should be strings!"
-                pass
-            else:
-                # Calculate CER
-                cer_result = cer.cer(predictions, groundtruth)
-                result_text = f"{matched_column}: {cer_result:.4f}"
-            result_texts.append(result_text)
-
-        # Calculate CER for all matched columns
-        predictions = cer.concatenate_columns(self.pred_data, matched_columns)
-        groundtruth = cer.concatenate_columns(self.gt_data, matched_columns)
-
-        # Process each element in predictions and groundtruth
-        predictions = [cer.process_text(pred) for pred in predictions]
-        groundtruth = [cer.process_text(gt) for gt in groundtruth]
-
-        # Ensure both lists have the same length
-        if len(predictions) != len(groundtruth):
-            self.result_label.setText("CER Result: Mismatched row counts!")
-            return
-        
-        # Ensure that each element in predictions and groundtruth is a string
-        if not all(isinstance(pred, str) for pred in predictions):
-            self.result_label.setText("CER Result: All predictions should be strings!")
-            return
-        if not all(isinstance(gt, str) for gt in groundtruth):
-            self.result_label.setText("CER Result: All groundtruth should be strings!")
-            return
+        self.result_label.setText("CER Result: Calculating...")
+        self.column_results_label.setText("")
+        self.calculate_button.setEnabled(False)
+        # Pair the rows by key and count the edits of every row of every matched column in one task,
+        # off the main thread, the per-column and overall CER are derived from these counts
+        task = Task(compute_edit_counts, self.pred_data, self.gt_data, self.tokenizer_dropdown.currentData())
+        task.signals.partial.connect(self.show_column_result)
+        task.signals.finished.connect(lambda result: self.show_result(*result))
+        task.signals.cancelled.connect(lambda: self.result_label.setText("CER Result: Cancelled"))
+        task.signals.failed.connect(lambda message: self.result_label.setText(f"CER Result: {message}"))
+        self.start_task(task)
+
+    def show_column_result(self, column_result):
+        matched_column, cer_result, wer_result = column_result
+        result_texts = [text for text in self.column_results_label.text().split("\n") if text]
+        result_text = f"{matched_column}: {cer_result:.4f}"
+        if wer_result is not None:
+            result_text += f" (WER {wer_result:.4f})"
+        result_texts.append(result_text)
+        self.column_results_label.setText("\n".join(result_texts))
 
-        # Calculate CER and display the overall result in percentage
-        cer_result = cer.cer(predictions, groundtruth)
-        self.result_label.setText(f"CER Result: {cer_result*100.00:.2f}%")
+    def show_result(self, edit_counts, confusions, report, keys):
+        self.edit_counts = edit_counts
+        self.confusions = confusions
+        # Highlight the rows of both files by their CER, found through their key
+        key_cer = row_cer_by_key(self.edit_counts, keys)
+        for data, table in [(self.pred_data, self.pred_table), (self.gt_data, self.gt_table)]:
+            if isinstance(table.model(), DataFrameModel) and table.model().dataframe is data:
+                table.model().set_row_cer(data.iloc[:, 0].map(key_cer).to_numpy(dtype=float))
+        top_confusions = confusion.top_confusions(self.confusions, TOP_CONFUSIONS)
+        for column in ['reference', 'hypothesis']:
+            top_confusions[column] = top_confusions[column].map(confusion.describe_character)
+        top_confusions['share'] = top_confusions['share'].map(lambda share: f"{share:.2%}")
+        self.display_data(top_confusions, self.confusions_table)
+        self.export_confusions_button.setEnabled(True)
+        # Calculate CER for all matched columns and display the overall result in percentage
+        cer_result = cer.cer_from_counts(self.edit_counts)
+        result_text = f"CER Result: {cer_result*100.00:.2f}%"
+        if all(column in self.edit_counts.columns for column in cer.TOKEN_COUNT_COLUMNS):
+            result_text += f", WER: {cer.wer_from_counts(self.edit_counts)*100.00:.2f}%"
+        unmatched = len(report.unmatched_hypotheses) + len(report.unmatched_references)
+        duplicates = len(report.duplicate_hypotheses) + len(report.duplicate_references)
+        if unmatched or duplicates:
+            result_text += f" ({unmatched} unmatched and {duplicates} duplicated keys ignored)"
+        self.result_label.setText(result_text)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+####################################################################################################
+# Description: Text normalization applied to whole columns before computing the CER.
+# Each step works on a pandas Series of strings at once instead of on every element separately. When pyarrow
+# is installed the strings are held in an Arrow-backed Series, whose lowercase, strip and regular expression
+# steps run in the C++ kernels of Arrow.
+# Missing values (NaN, None) become empty strings rather than the text "nan".
+# The default steps, lowercase and strip, give the same text as `cer.process_text()`, apart from the missing
+# values and, with pyarrow, the few letters whose Arrow lowercase differs (see `TEXT_DTYPE`).
+####################################################################################################
+
+from typing import Callable, Dict, Iterable, List
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Arrow's lowercase maps every character on its own, unlike `str.lower()`: a final capital sigma becomes σ rather
+# than ς, the dotted capital I becomes i rather than i and a combining dot, and recent Unicode letters may differ
+TEXT_DTYPE = 'string[pyarrow]' if pyarrow is not None else 'string[python]'
+
+# Zero-width characters that OCR outputs and copy-pasted ground truth often contain
+ZERO_WIDTH_CHARACTERS = '[\u200b\u200c\u200d\u2060\ufeff\u00ad]'
+# Thai tone marks (mai ek, mai tho, mai tri, mai chattawa)
+THAI_TONE_MARKS = '[\u0e48-\u0e4b]'
+# Thai vowels written above or below the consonant, which come before the tone mark
+THAI_ABOVE_BELOW_VOWELS = '[\u0e31\u0e34-\u0e3a\u0e47]'
+# The characters of `str.isspace()`, spelled out since \s of Arrow's regular expressions only matches ASCII whitespace
+WHITESPACE = '[\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]'
+
+def _lowercase(texts: pd.Series) -> pd.Series:
+    return texts.str.lower()
+
+def _strip(texts: pd.Series) -> pd.Series:
+    return texts.str.strip()
+
+def _nfc(texts: pd.Series) -> pd.Series:
+    return texts.str.normalize('NFC')
+
+def _collapse_whitespace(texts: pd.Series) -> pd.Series:
+    return texts.str.replace(f'{WHITESPACE}+', ' ', regex=True)
+
+def _remove_zero_width(texts: pd.Series) -> pd.Series:
+    return texts.str.replace(ZERO_WIDTH_CHARACTERS, '', regex=True)
+
+def _thai(texts: pd.Series) -> pd.Series:
+    # Nikhahit followed by sara aa is the decomposed form of sara am, the tone mark goes before it
+    texts = texts.str.replace(f'({THAI_TONE_MARKS}?)\u0e4d({THAI_TONE_MARKS}?)\u0e32', '\\1\\2\u0e33', regex=True)
+    # A tone mark typed before an above or below vowel is moved after it
+    return texts.str.replace(f'({THAI_TONE_MARKS})({THAI_ABOVE_BELOW_VOWELS})', '\\2\\1', regex=True)
+
+# Normalization steps by name, applied in the order they are given to `normalize()`
+NORMALIZATION_STEPS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'lowercase': _lowercase,
+    'strip': _strip,
+    'nfc': _nfc,
+    'collapse_whitespace': _collapse_whitespace,
+    'remove_zero_width': _remove_zero_width,
+    'thai': _thai,
+}
+DEFAULT_STEPS = ['lowercase', 'strip']
+
+def normalize(values: Iterable, steps: List[str] = DEFAULT_STEPS) -> List[str]:
+    """
+    Normalize a whole column of values
+    Args:
+        values: list or pandas.Series of values of any type, missing values become empty strings
+        steps: list of names in `NORMALIZATION_STEPS`, applied in order
+    Returns:
+        normalized_values: list of strings
+    """
+    unknown_steps = [step for step in steps if step not in NORMALIZATION_STEPS]
+    if unknown_steps:
+        raise ValueError(f"Unknown normalization steps {', '.join(unknown_steps)}, available steps are {', '.join(NORMALIZATION_STEPS)}")
+    texts = pd.Series(values).astype(TEXT_DTYPE).fillna('')
+    for step in steps:
+        texts = NORMALIZATION_STEPS[step](texts)
+    return texts.tolist()
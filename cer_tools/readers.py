@@ -0,0 +1,178 @@
+####################################################################################################
+# Description: Readers of the prediction and groundtruth files, selected by file extension.
+# Supported formats are CSV (optionally gzip'd), XLSX, Parquet, Arrow IPC/Feather and JSON lines
+# (optionally gzip'd). Every reader only decodes the requested columns when the format allows it.
+# Parquet and Arrow files need pyarrow, which is also used as the CSV and JSON parser when installed.
+####################################################################################################
+
+from typing import Callable, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+def _require_pyarrow(file_path: str) -> None:
+    if pyarrow is None:
+        raise ImportError(f"pyarrow is required to read {file_path}, install it with `pip install pyarrow`")
+
+def _as_text(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the values of every column to strings, keeping missing values missing
+    """
+    return dataframe.apply(lambda column: column.astype(object).where(column.isna(), column.astype(str)))
+
+def _read_csv(file_path: str, columns: Optional[List[str]], as_text: bool) -> pd.DataFrame:
+    # The pyarrow engine parses the file with several threads, gzip'd files are decompressed by pandas
+    if pyarrow is None:
+        return pd.read_csv(file_path, usecols=columns, dtype=str if as_text else None)
+    if not as_text:
+        return pd.read_csv(file_path, usecols=columns, engine='pyarrow')
+    # The pyarrow engine of pandas infers the types before applying dtype, so "007" would become "7",
+    # the columns are instead declared as strings to pyarrow
+    names = columns if columns is not None else list(pd.read_csv(file_path, nrows=0).columns)
+    convert_options = pyarrow.csv.ConvertOptions(include_columns=columns or [], column_types={name: pyarrow.string() for name in names}, strings_can_be_null=True)
+    dataframe = pyarrow.csv.read_csv(file_path, convert_options=convert_options).to_pandas()
+    return dataframe.astype(object).where(dataframe.notna(), np.nan)
+
+def _read_excel(file_path: str, columns: Optional[List[str]], as_text: bool) -> pd.DataFrame:
+    return pd.read_excel(file_path, usecols=columns, dtype=str if as_text else None)
+
+def _read_parquet(file_path: str, columns: Optional[List[str]], as_text: bool) -> pd.DataFrame:
+    _require_pyarrow(file_path)
+    dataframe = pyarrow.parquet.read_table(file_path, columns=columns).to_pandas()
+    return _as_text(dataframe) if as_text else dataframe
+
+def _read_arrow(file_path: str, columns: Optional[List[str]], as_text: bool) -> pd.DataFrame:
+    _require_pyarrow(file_path)
+    # The file is memory-mapped, only the buffers of the requested columns are read
+    dataframe = pyarrow.feather.read_table(file_path, columns=columns, memory_map=True).to_pandas()
+    return _as_text(dataframe) if as_text else dataframe
+
+def _read_jsonl(file_path: str, columns: Optional[List[str]], as_text: bool) -> pd.DataFrame:
+    if pyarrow is not None and not file_path.endswith('.gz'):
+        dataframe = pd.read_json(file_path, lines=True, engine='pyarrow')
+    else:
+        dataframe = pd.read_json(file_path, lines=True, dtype=False)
+    if columns is not None:
+        dataframe = dataframe[columns]
+    return _as_text(dataframe) if as_text else dataframe
+
+# Readers by file extension, each reader takes the path, the optional list of columns and whether to read the values as text
+READERS: Dict[str, Callable[[str, Optional[List[str]], bool], pd.DataFrame]] = {
+    '.csv': _read_csv,
+    '.csv.gz': _read_csv,
+    '.xlsx': _read_excel,
+    '.parquet': _read_parquet,
+    '.arrow': _read_arrow,
+    '.feather': _read_arrow,
+    '.ipc': _read_arrow,
+    '.jsonl': _read_jsonl,
+    '.jsonl.gz': _read_jsonl,
+}
+
+def file_format(file_path: str) -> str:
+    """
+    Get the extension of a supported file, the longest matching one (e.g. '.csv.gz' rather than '.gz')
+
+    Args:
+        file_path (str): path to the file
+    Returns:
+        extension (str): key of `READERS`
+    """
+    for extension in sorted(READERS, key=len, reverse=True):
+        if file_path.lower().endswith(extension):
+            return extension
+    raise ValueError(f"Only {', '.join(READERS)} files are supported")
+
+def read_file(file_path: str, columns: Optional[List[str]] = None, as_text: bool = False) -> pd.DataFrame:
+    """
+    Read a CSV, XLSX, Parquet, Arrow or JSON lines file and return the dataframe
+
+    Args:
+        file_path (str): path to the file
+        columns (list): optional list of column names to read, all columns by default
+        as_text (bool): read every value as a string, missing values stay missing
+    Returns:
+        dataframe (pandas.DataFrame): dataframe containing the data
+    """
+    return READERS[file_format(file_path)](file_path, columns, as_text)
+
+def read_head(file_path: str, rows: int = 5) -> pd.DataFrame:
+    """
+    Read only the first rows of a file, as text, e.g. for a preview
+
+    Args:
+        file_path (str): path to the file
+        rows (int): number of rows to read
+    Returns:
+        dataframe (pandas.DataFrame): dataframe containing the first rows
+    """
+    extension = file_format(file_path)
+    if extension in ('.csv', '.csv.gz'):
+        dataframe = pd.read_csv(file_path, dtype=str, nrows=rows)
+    elif extension == '.xlsx':
+        dataframe = pd.read_excel(file_path, dtype=str, nrows=rows)
+    elif extension in ('.jsonl', '.jsonl.gz'):
+        dataframe = pd.read_json(file_path, lines=True, dtype=False, nrows=rows)
+    elif extension == '.parquet':
+        _require_pyarrow(file_path)
+        batch = next(pyarrow.parquet.ParquetFile(file_path).iter_batches(batch_size=rows), None)
+        dataframe = batch.to_pandas() if batch is not None else pd.DataFrame(columns=pyarrow.parquet.read_schema(file_path).names)
+    else:
+        _require_pyarrow(file_path)
+        with pyarrow.memory_map(file_path) as source:
+            dataframe = pyarrow.ipc.open_file(source).read_all().slice(0, rows).to_pandas()
+    return _as_text(dataframe)
+
+def _parquet_chunks(file_path: str, column_name: str, chunk_size: int) -> Iterator[List[str]]:
+    _require_pyarrow(file_path)
+    for batch in pyarrow.parquet.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=[column_name]):
+        yield batch.column(0).to_pylist()
+
+def _arrow_chunks(file_path: str, column_name: str, chunk_size: int) -> Iterator[List[str]]:
+    _require_pyarrow(file_path)
+    with pyarrow.memory_map(file_path) as source:
+        table = pyarrow.ipc.open_file(source).read_all().select([column_name])
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.column(0).to_pylist()
+
+def _text_chunks(reader) -> Iterator[List[str]]:
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+def read_column_chunks(file_path: str, column_name: str, chunk_size: int = 100000) -> Iterator[List[str]]:
+    """
+    Read one column of a file in chunks of rows without loading the whole file
+
+    Args:
+        file_path (str): path to a CSV, Parquet, Arrow or JSON lines file
+        column_name (str): column name, the other columns are not parsed when the format allows it
+        chunk_size (int): number of rows per chunk
+    Returns:
+        chunks (iterator): lists of values of the column
+    """
+    extension = file_format(file_path)
+    if extension in ('.csv', '.csv.gz'):
+        # Values are kept as text so that every chunk is parsed the same way whatever its content
+        for chunk in _text_chunks(pd.read_csv(file_path, usecols=[column_name], dtype=str, chunksize=chunk_size)):
+            yield chunk[column_name].values.tolist()
+    elif extension in ('.jsonl', '.jsonl.gz'):
+        for chunk in _text_chunks(pd.read_json(file_path, lines=True, dtype=False, chunksize=chunk_size)):
+            yield chunk[column_name].values.tolist()
+    elif extension == '.parquet':
+        yield from _parquet_chunks(file_path, column_name, chunk_size)
+    elif extension in ('.arrow', '.feather', '.ipc'):
+        yield from _arrow_chunks(file_path, column_name, chunk_size)
+    else:
+        raise ValueError(f"{extension} files can not be read in chunks")
+
+# Formats supported by `read_column_chunks()`
+STREAMING_FORMATS = ['.csv', '.csv.gz', '.jsonl', '.jsonl.gz', '.parquet', '.arrow', '.feather', '.ipc']
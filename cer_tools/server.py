@@ -0,0 +1,365 @@
+####################################################################################################
+# Description: Long-running local HTTP server scoring the CER, so that training jobs calling it after
+# every validation epoch do not pay the import and setup cost of pandas and the scoring engine each time.
+# Endpoints:
+# - POST /score: the body is JSON lines, one request {"id": ..., "hypotheses": [...], "references": [...]}
+#   per line. The response is streamed as JSON lines in the same order, one
+#   {"id": ..., "cer": ..., "errors": ..., "reference_length": ...} per request line as soon as it is
+#   scored, or {"id": ..., "error": ...} for an invalid line.
+# - GET /metrics: request, pair and batch counts, latency percentiles and throughput as JSON
+# - GET /health: {"status": "ok"}
+# The requests of all the connections are queued and micro-batched: the pairs received within
+# `--max_delay` seconds (or while the previous batch is being scored) are scored together with a single
+# `cer.row_errors()` call, up to `--max_batch_size` pairs. With `--workers`, the batches are scored in the
+# persistent worker processes of `cer.worker_pool()`, started with the server and stopped with it.
+# `client.py` is a client that does not import pandas.
+# Usage: python server.py --port 8765 --workers 0
+####################################################################################################
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+try:
+    from . import cer, normalization
+except ImportError:
+    # Imported as a top-level module by the scripts in this directory
+    import cer
+    import normalization
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Number of the most recent request latencies kept for the percentiles of /metrics
+LATENCY_WINDOW = 10000
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1 << 30
+
+class ScoreRequest(NamedTuple):
+    """
+    Pairs of one request line waiting in the batch queue, the future receives (errors, reference_length)
+    """
+    hypotheses: List[str]
+    references: List[str]
+    future: asyncio.Future
+    received: float
+
+class ServerMetrics:
+    """
+    Counters of the scored requests, pairs and batches with the latencies of the most recent requests
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.pairs = 0
+        self.batches = 0
+        self.invalid_requests = 0
+        self.scoring_time = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_batch(self, requests: int, pairs: int, scoring_time: float) -> None:
+        self.batches += 1
+        self.requests += requests
+        self.pairs += pairs
+        self.scoring_time += scoring_time
+
+    def record_latency(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def snapshot(self, queued: int = 0) -> Dict[str, Any]:
+        """
+        Current metrics, the latencies are in milliseconds and the throughputs in pairs per second
+        """
+        uptime = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [0.0, 0.0, 0.0]
+        return {
+            'uptime': uptime,
+            'requests': self.requests,
+            'pairs': self.pairs,
+            'batches': self.batches,
+            'invalid_requests': self.invalid_requests,
+            'queued_requests': queued,
+            'mean_batch_requests': self.requests / self.batches if self.batches else 0.0,
+            'mean_batch_pairs': self.pairs / self.batches if self.batches else 0.0,
+            'latency_ms': {
+                'mean': float(latencies.mean()) if len(latencies) else 0.0,
+                'p50': float(percentiles[0]),
+                'p95': float(percentiles[1]),
+                'p99': float(percentiles[2]),
+                'max': float(latencies.max()) if len(latencies) else 0.0,
+            },
+            'pairs_per_second': self.pairs / uptime if uptime else 0.0,
+            'scoring_pairs_per_second': self.pairs / self.scoring_time if self.scoring_time else 0.0,
+        }
+
+class MicroBatcher:
+    """
+    Queue of score requests scored together in batches by one background task
+    The scoring runs in a separate thread so that the event loop keeps receiving requests meanwhile,
+    which are then scored in the next batch.
+    """
+    def __init__(self, max_batch_size: int = 10000, max_delay: float = 0.005, workers: int = 1, steps: Optional[List[str]] = None, metrics: Optional[ServerMetrics] = None):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.workers = workers
+        self.steps = steps or []
+        self.metrics = metrics or ServerMetrics()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.workers != 1:
+            # The worker processes live as long as the server, they are started before the first batch
+            self.executor.submit(self._start_workers)
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+        if self.workers != 1:
+            cer.shutdown_worker_pools()
+
+    def _start_workers(self) -> None:
+        pool = cer.worker_pool(self.workers)
+        # The pool starts a process for each task submitted while none is idle
+        for future in [pool.submit(time.perf_counter) for _ in range(self.workers or os.cpu_count() or 1)]:
+            future.result()
+
+    async def score(self, hypotheses: List[str], references: List[str]) -> Tuple[int, int]:
+        """
+        Queue the pairs of one request and wait for their batch to be scored
+        Returns:
+            errors: summed edit distance of the pairs with a non-empty reference
+            reference_length: summed length of the non-empty references
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(ScoreRequest(hypotheses, references, future, time.perf_counter()))
+        return await future
+
+    async def _next_batch(self) -> List[ScoreRequest]:
+        batch = [await self.queue.get()]
+        pairs = len(batch[0].hypotheses)
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while pairs < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0 and self.queue.empty():
+                break
+            try:
+                request = self.queue.get_nowait() if not self.queue.empty() else await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(request)
+            pairs += len(request.hypotheses)
+        return batch
+
+    def _score_batch(self, hypotheses: List[str], references: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        if self.steps:
+            hypotheses = normalization.normalize(hypotheses, self.steps)
+            references = normalization.normalize(references, self.steps)
+        return cer.row_errors(hypotheses, references, self.workers)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            hypotheses = [hypothesis for request in batch for hypothesis in request.hypotheses]
+            references = [reference for request in batch for reference in request.references]
+            start = time.perf_counter()
+            try:
+                errors, reference_length = await loop.run_in_executor(self.executor, self._score_batch, hypotheses, references)
+            except Exception as error:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+                continue
+            done = time.perf_counter()
+            self.metrics.record_batch(len(batch), len(hypotheses), done - start)
+            # Split the per-pair counts back into the requests, pairs with an empty reference are ignored as in `cer.cer()`
+            offsets = np.cumsum([0] + [len(request.hypotheses) for request in batch])
+            error_sums = np.concatenate([[0], np.cumsum(np.where(reference_length > 0, errors, 0))])
+            length_sums = np.concatenate([[0], np.cumsum(reference_length)])
+            for index, request in enumerate(batch):
+                start, stop = offsets[index], offsets[index + 1]
+                if not request.future.done():
+                    request.future.set_result((int(error_sums[stop] - error_sums[start]), int(length_sums[stop] - length_sums[start])))
+                self.metrics.record_latency(done - request.received)
+
+def validate_request(request: Any) -> Tuple[List[str], List[str]]:
+    """
+    Check one parsed JSON line of a /score request
+    Returns:
+        hypotheses: list of strings
+        references: list of strings
+    """
+    if not isinstance(request, dict):
+        raise ValueError("A request should be a JSON object")
+    hypotheses, references = request.get('hypotheses'), request.get('references')
+    if not isinstance(hypotheses, list) or not isinstance(references, list):
+        raise ValueError("A request should have the lists 'hypotheses' and 'references'")
+    if len(hypotheses) != len(references):
+        raise ValueError("Number of hypotheses and references should be the same")
+    if not all(isinstance(text, str) for text in hypotheses + references):
+        raise ValueError("Hypotheses and references should be strings")
+    return hypotheses, references
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = b''
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+            if len(body) > MAX_BODY_SIZE:
+                raise ValueError("Request body too large")
+    else:
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length)
+    return method, path.split('?', 1)[0], headers, body
+
+def _response_head(status: str, content_type: str, headers: Dict[str, str]) -> bytes:
+    lines = [f'HTTP/1.1 {status}', f'Content-Type: {content_type}'] + [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+async def _send_json(writer: asyncio.StreamWriter, status: str, content: Any) -> None:
+    body = json.dumps(content).encode('utf-8')
+    writer.write(_response_head(status, 'application/json', {'Content-Length': str(len(body))}) + body)
+    await writer.drain()
+
+class ScoringServer:
+    """
+    HTTP server of the CER, see the description of this module for the endpoints
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_batch_size: int = 10000, max_delay: float = 0.005, workers: int = 1, steps: Optional[List[str]] = None):
+        self.host = host
+        self.port = port
+        self.metrics = ServerMetrics()
+        self.batcher = MicroBatcher(max_batch_size, max_delay, workers, steps, self.metrics)
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Connections are kept alive so that a client sends all its requests over one connection
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as error:
+                    await _send_json(writer, '400 Bad Request', {'error': str(error)})
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == '/score' and method == 'POST':
+                    await self._score(writer, body)
+                elif path == '/metrics' and method == 'GET':
+                    await _send_json(writer, '200 OK', self.metrics.snapshot(self.batcher.queue.qsize()))
+                elif path == '/health' and method == 'GET':
+                    await _send_json(writer, '200 OK', {'status': 'ok'})
+                elif path in ('/score', '/metrics', '/health'):
+                    await _send_json(writer, '405 Method Not Allowed', {'error': f'{method} is not allowed on {path}'})
+                else:
+                    await _send_json(writer, '404 Not Found', {'error': f'Unknown path {path}'})
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _score(self, writer: asyncio.StreamWriter, body: bytes) -> None:
+        # Every line is queued at once so that the lines of one body are batched together with the other requests
+        pending = []
+        for line in body.split(b'\n'):
+            if not line.strip():
+                continue
+            request_id = None
+            try:
+                request = json.loads(line)
+                # The id is returned even when the rest of the request is invalid
+                if isinstance(request, dict):
+                    request_id = request.get('id')
+                hypotheses, references = validate_request(request)
+            except ValueError as error:
+                self.metrics.invalid_requests += 1
+                pending.append((request_id, str(error)))
+                continue
+            pending.append((request_id, asyncio.ensure_future(self.batcher.score(hypotheses, references))))
+        writer.write(_response_head('200 OK', 'application/x-ndjson', {'Transfer-Encoding': 'chunked'}))
+        # Every result is sent as soon as it is scored, in the order of the request lines
+        for request_id, result in pending:
+            if isinstance(result, str):
+                content = {'id': request_id, 'error': result}
+            else:
+                try:
+                    errors, reference_length = await result
+                    # If no valid pairs remain, the CER is 1.0 (100% error rate) as in `cer.cer()`
+                    content = {'id': request_id, 'cer': errors / reference_length if reference_length else 1.0, 'errors': errors, 'reference_length': reference_length}
+                except Exception as error:
+                    content = {'id': request_id, 'error': str(error)}
+            chunk = (json.dumps(content) + '\n').encode('utf-8')
+            writer.write(f'{len(chunk):x}\r\n'.encode('latin-1') + chunk + b'\r\n')
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the Character Error Rate (CER) over HTTP with micro-batching')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Address the server listens on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port the server listens on, 0 for any free port')
+    parser.add_argument('--max_batch_size', type=int, default=10000, help='Maximum number of pairs scored in one batch')
+    parser.add_argument('--max_delay', type=float, default=0.005, help='Seconds a request waits for others to be batched with')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes scoring each batch, 0 for all CPU cores')
+    parser.add_argument('--normalization', type=str, nargs='+', default=[], choices=list(normalization.NORMALIZATION_STEPS), help='Normalization steps applied to the text, the text is scored as sent by default like `cer.cer()`')
+    args = parser.parse_args()
+    server = ScoringServer(args.host, args.port, args.max_batch_size, args.max_delay, args.workers, args.normalization)
+    print(f'Serving the CER on http://{args.host}:{args.port}')
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,36 @@
+##############################################################################
+# A unittest for benchmark.py
+##############################################################################
+
+import unittest
+from cer_tools import benchmark, cer
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_datasets(self):
+        for name, generator in benchmark.DATASETS.items():
+            with self.subTest(dataset=name):
+                hypotheses, references = generator(50, seed=1)
+                self.assertEqual(len(hypotheses), 50)
+                self.assertEqual(len(references), 50)
+                self.assertTrue(all(references))
+                # Same seed, same pairs
+                self.assertEqual(generator(50, seed=1), (hypotheses, references))
+        self.assertLess(cer.cer(*benchmark.latin_lines(200)), cer.cer(*benchmark.divergent_pairs(200)))
+
+    def test_run_benchmarks(self):
+        report = benchmark.run_benchmarks(['scoring', 'cache', 'normalization'], ['latin_lines'], [20], repeat=1)
+        self.assertEqual({(result['benchmark'], result['name']) for result in report['results']},
+                         {('scoring', 'native'), ('scoring', 'jiwer'), ('cache', 'no_cache'), ('cache', 'warm_cache'), ('normalization', 'normalize'), ('normalization', 'process_text')})
+        for result in report['results']:
+            self.assertEqual(result['rows'], 20)
+            self.assertGreater(result['seconds'], 0)
+            self.assertGreaterEqual(result['peak_memory_bytes'], 0)
+
+    def test_compare(self):
+        result = {'benchmark': 'scoring', 'name': 'native', 'dataset': 'latin_lines', 'rows': 10}
+        baseline = {'results': [{**result, 'seconds': 1.0}, {**result, 'rows': 20, 'seconds': 1.0}]}
+        current = {'results': [{**result, 'seconds': 1.05}, {**result, 'rows': 20, 'seconds': 2.0}]}
+        regressions = benchmark.compare(baseline, current, tolerance=0.1)
+        self.assertEqual([regression['rows'] for regression in regressions], [20])
+        self.assertEqual(regressions[0]['slowdown'], 2.0)
@@ -0,0 +1,44 @@
+##############################################################################
+# A unittest for bootstrap.py
+##############################################################################
+
+import unittest
+import numpy as np
+from cer_tools import bootstrap
+
+class TestBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.reference_length = rng.integers(1, 40, size=5000)
+        self.errors = rng.binomial(self.reference_length, 0.05)
+
+    def test_bootstrap_cer(self):
+        result = bootstrap.bootstrap_cer(self.errors, self.reference_length, samples=500, seed=0)
+        self.assertEqual(result.cer, self.errors.sum() / self.reference_length.sum())
+        self.assertLess(result.low, result.cer)
+        self.assertGreater(result.high, result.cer)
+        self.assertEqual(bootstrap.bootstrap_cer(self.errors, self.reference_length, samples=500, seed=0), result)
+        # A higher confidence gives a wider interval
+        wider = bootstrap.bootstrap_cer(self.errors, self.reference_length, samples=500, confidence=0.99, seed=0)
+        self.assertLess(wider.low, result.low)
+        self.assertGreater(wider.high, result.high)
+
+    def test_empty_references_ignored(self):
+        errors = np.append(self.errors, [3, 5])
+        reference_length = np.append(self.reference_length, [0, 0])
+        self.assertEqual(bootstrap.bootstrap_cer(errors, reference_length, samples=100, seed=0),
+                         bootstrap.bootstrap_cer(self.errors, self.reference_length, samples=100, seed=0))
+        with self.assertRaises(ValueError):
+            bootstrap.bootstrap_cer([1], [0])
+
+    def test_paired_bootstrap(self):
+        # One more error every 10 rows is a significant difference
+        worse = self.errors + (np.arange(len(self.errors)) % 10 == 0)
+        result = bootstrap.paired_bootstrap(self.errors, worse, self.reference_length, samples=500, seed=0)
+        self.assertAlmostEqual(result.difference, result.cer_b - result.cer_a)
+        self.assertGreater(result.low, 0)
+        self.assertLess(result.p_value, 0.01)
+        # The same system is not different from itself
+        same = bootstrap.paired_bootstrap(self.errors, self.errors, self.reference_length, samples=500, seed=0)
+        self.assertEqual((same.difference, same.low, same.high, same.p_value), (0, 0, 0, 1.0))
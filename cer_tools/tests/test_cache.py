@@ -0,0 +1,49 @@
+##############################################################################
+# A unittest for cache.py
+##############################################################################
+
+import tempfile
+import unittest
+from cer_tools import cer
+from cer_tools.cache import ScoreCache, pair_key
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pair_key(self):
+        self.assertEqual(pair_key('ab', 'c'), pair_key('ab', 'c'))
+        self.assertNotEqual(pair_key('ab', 'c'), pair_key('a', 'bc'))
+        self.assertNotEqual(pair_key('ab', 'c'), pair_key('c', 'ab'))
+
+    def test_cer_with_cache(self):
+        hypotheses = ['helo', 'world', 'ถนนพหลโยธน', 'abc']
+        references = ['hello', 'word', 'ถนนพหลโยธิน', 'abd']
+        expected = cer.cer(hypotheses, references)
+        # Pairs this short are scored without the cache by default
+        with ScoreCache(self.directory.name) as cache:
+            self.assertEqual(cer.cer(hypotheses, references, cache=cache), expected)
+            self.assertEqual((cache.stats()['misses'], cache.stats()['bypassed'], len(cache)), (0, 4, 0))
+        with ScoreCache(self.directory.name, min_length=0) as cache:
+            self.assertEqual(cer.cer(hypotheses, references, cache=cache), expected)
+            self.assertEqual((cache.stats()['misses'], cache.stats()['bypassed']), (4, 0))
+        # A new run only scores the changed pair
+        hypotheses[0] = 'hello'
+        with ScoreCache(self.directory.name, min_length=0) as cache:
+            self.assertEqual(cer.cer(hypotheses, references, cache=cache), cer.cer(hypotheses, references))
+            self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (3, 1))
+            self.assertEqual(cer.cer(hypotheses, references, max_distance=0, cache=cache), cer.cer(hypotheses, references, max_distance=0))
+
+    def test_eviction(self):
+        with ScoreCache(self.directory.name, max_entries=2) as cache:
+            cache.put_many([1, 2], [1, 2])
+            cache.get_many([1])
+            cache.put_many([3], [3])
+            # 2 is the least recently used entry
+            self.assertEqual(cache.get_many([1, 2, 3]), {1: 1, 3: 3})
+            self.assertEqual(cache.stats()['evictions'], 1)
+            self.assertEqual(len(cache), 2)
@@ -2,10 +2,17 @@
 # A unittest for cer.py
 ##############################################################################
 
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
 from cer_tools import cer
+import jiwer
 import pandas as pd
 
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cer_calculation.py')
+
 class TestCer(unittest.TestCase):
     
     def test_cer(self):
@@ -19,6 +26,11 @@ class TestCer(unittest.TestCase):
         self.assertEqual(cer_score, 1.0)
         cer_score = cer.cer(['เลขที่ 84 หมู่ 14 ถนนพหลโยธิน ตำบลปากน้ำโพ อำเภอเมือง จังหวัดนครสวรรค์ 60000', 'เลขที่ 62 หมู่ 12 ถนนพหลโยธิน ตำบลเวียง อำเภอเมือง จังหวัดเชียงราย 57000'], ['เลขที่ 64 หมู่ 14 ถนนพหลโยธิน ตำบลปากน้ำโพ อำเภอเมือง จังหวัดนครสวรรค์ 60000', 'เลขที่ 62 หมู่ 12 ถนนพหลโยธิน ตำบลเวียง อำเภอเมือง จังหวัดเชียงราย 57000'])
         assert cer_score > 0.0
+        # Test that the error rate is relative to the length of the references
+        cer_score = cer.cer(['helo'], ['hello'])
+        self.assertEqual(cer_score, 0.2)
+        cer_score = cer.cer(['', 'world'], ['hello', 'world'])
+        self.assertEqual(cer_score, 0.5)
         # Test for empty strings in references
         cer_score = cer.cer(['hello', 'world'], ['hello', ''])
         self.assertEqual(cer_score, 0.0)  # Should ignore the empty reference pair
@@ -26,6 +38,47 @@ class TestCer(unittest.TestCase):
         cer_score = cer.cer(['hello', 'world'], ['', ''])
         self.assertEqual(cer_score, 1.0)  # Should return 100% error rate
 
+    def test_cer_workers(self):
+        # Enough pairs to be split into several chunks
+        hypotheses = ['helo', 'world', 'ถนนพหลโยธน', ''] * 1500
+        references = ['hello', 'word', 'ถนนพหลโยธิน', 'abc'] * 1500
+        serial = cer.edit_counts(hypotheses, references)
+        parallel = cer.edit_counts(hypotheses, references, workers=2, chunk_size=1000)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(cer.cer(hypotheses, references), cer.cer(hypotheses, references, workers=2))
+        # The worker processes are started once and reused by the next calls
+        pool = cer.worker_pool(2)
+        self.assertEqual(cer.row_errors(hypotheses, references, workers=2)[0].tolist(), cer.row_errors(hypotheses, references)[0].tolist())
+        self.assertIs(cer.worker_pool(2), pool)
+        cer.shutdown_worker_pools()
+        self.assertIsNot(cer.worker_pool(2), pool)
+
+    def test_stream_cer(self):
+        hypotheses = ['helo', 'world', 'ถนนพหลโยธน', 'x', 'abc']
+        references = ['hello', 'word', 'ถนนพหลโยธิน', '', 'abd']
+        expected = cer.cer(hypotheses, references)
+        chunks = lambda values: [values[start:start + 2] for start in range(0, len(values), 2)]
+        self.assertEqual(cer.stream_cer(chunks(hypotheses), chunks(references)), expected)
+        self.assertEqual(cer.stream_cer([], []), 1.0)
+        with self.assertRaises(ValueError):
+            cer.stream_cer(chunks(hypotheses), chunks(references[:-1]))
+
+    def test_row_errors(self):
+        hypotheses = ['helo ', 'world', 'ถนนพหลโยธน', 'x'] * 1000
+        references = ['hello', ' word', 'ถนนพหลโยธิน', ''] * 1000
+        errors, reference_length = cer.row_errors(hypotheses, references)
+        self.assertEqual(errors[:4].tolist(), [1, 1, 1, 1])
+        self.assertEqual(reference_length[:4].tolist(), [5, 4, 11, 0])
+        # Same counts as `cer()` over the pairs with a non-empty reference
+        valid = reference_length > 0
+        self.assertEqual(errors[valid].sum() / reference_length[valid].sum(), cer.cer(hypotheses, references))
+        parallel_errors, _ = cer.row_errors(hypotheses, references, workers=2, chunk_size=1000)
+        self.assertEqual(parallel_errors.tolist(), errors.tolist())
+
+    def test_read_column_chunks(self):
+        chunks = list(cer.read_column_chunks('cer_tools/tests/test_data.csv', 'predictions', chunk_size=1))
+        self.assertEqual(chunks, [['world'], ['hello']])
+
     def test_read_file(self):
         df = cer.read_file('cer_tools/tests/test_data.csv')
         self.assertIsInstance(df, pd.DataFrame)
@@ -35,4 +88,125 @@ class TestCer(unittest.TestCase):
         values = cer.get_column_to_list(df, 'groundtruths')
         self.assertEqual(values, ['hello', 'world'])
         values = cer.get_column_to_list(df, 'predictions')
-        self.assertEqual(values, ['world', 'hello'])
\ No newline at end of file
+        self.assertEqual(values, ['world', 'hello'])
+
+    def test_join_on_key(self):
+        predictions = pd.DataFrame({'id': [3, 1, 2, 5, 1], 'text': ['c', 'a', 'b', 'e', 'x']})
+        groundtruth = pd.DataFrame({'id': [1, 2, 3, 4], 'text': ['a', 'b', 'c', 'd']})
+        aligned_predictions, aligned_groundtruth, report = cer.join_on_key(predictions, groundtruth)
+        self.assertEqual(cer.get_column_to_list(aligned_predictions, 'id'), [3, 1, 2])
+        self.assertEqual(cer.get_column_to_list(aligned_predictions, 'text'), cer.get_column_to_list(aligned_groundtruth, 'text'))
+        self.assertEqual(report.unmatched_hypotheses, [5])
+        self.assertEqual(report.unmatched_references, [4])
+        self.assertEqual(report.duplicate_hypotheses, [1])
+        self.assertEqual(report.duplicate_references, [])
+        # A key column other than the first one
+        aligned_predictions, aligned_groundtruth, report = cer.join_on_key(predictions, groundtruth, key_column='text')
+        self.assertEqual(cer.get_column_to_list(aligned_predictions, 'id'), [3, 1, 2])
+        self.assertEqual(report.unmatched_hypotheses, ['e', 'x'])
+        # Rows with a missing or blank key are never paired
+        predictions = pd.DataFrame({'id': ['1', '', None, ' '], 'text': ['a', 'xyz', 'b', 'c']})
+        groundtruth = pd.DataFrame({'id': ['1', '', None], 'text': ['a', 'foo', 'd']})
+        aligned_predictions, aligned_groundtruth, report = cer.join_on_key(predictions, groundtruth)
+        self.assertEqual(cer.get_column_to_list(aligned_predictions, 'text'), ['a'])
+        self.assertEqual(cer.get_column_to_list(aligned_groundtruth, 'text'), ['a'])
+        self.assertEqual(report.unmatched_hypotheses, ['', None, ' '])
+        self.assertEqual(report.unmatched_references, ['', None])
+        self.assertEqual(report.duplicate_hypotheses, [])
+
+    def test_column_edit_counts(self):
+        predictions = pd.DataFrame({'id': [1, 2, 3], 'a': ['helo', 'World ', 'x'], 'b': ['abc', 'ถนนพหลโยธน', 'y']})
+        groundtruth = pd.DataFrame({'id': [1, 2, 3], 'a': ['hello', 'word', ' '], 'b': ['abd', 'ถนนพหลโยธิน', 'yz']})
+        counts = cer.column_edit_counts(predictions, groundtruth, ['a', 'b'])
+        self.assertEqual(len(counts), 6)
+        first = counts.iloc[0]
+        self.assertEqual((first['substitutions'], first['deletions'], first['insertions'], first['reference_length']), (0, 1, 0, 5))
+        summary = cer.summarize_edit_counts(counts)
+        # The per-column and overall CER from the counts are the same as rescoring the lists
+        for column in ['a', 'b']:
+            hypotheses = [cer.process_text(value) for value in predictions[column]]
+            references = [cer.process_text(value) for value in groundtruth[column]]
+            self.assertAlmostEqual(summary.loc[column, 'cer'], cer.cer(hypotheses, references))
+        hypotheses = [cer.process_text(value) for value in cer.concatenate_columns(predictions, ['a', 'b'])]
+        references = [cer.process_text(value) for value in cer.concatenate_columns(groundtruth, ['a', 'b'])]
+        self.assertAlmostEqual(cer.cer_from_counts(counts), cer.cer(hypotheses, references))
+
+    def test_wer(self):
+        hypotheses = ['the cat sat on mat', 'hello world', 'a b c', 'x']
+        references = ['the cat sat on the mat', 'hello word', 'a b c d', '  ']
+        # Same as the WER of jiwer, which ignores no pair, once the pair without reference words is removed
+        self.assertAlmostEqual(cer.wer(hypotheses, references), jiwer.wer(references[:3], hypotheses[:3]))
+        self.assertEqual(cer.wer(['a'], ['']), 1.0)
+        # Thai words are segmented, only the district differs
+        self.assertAlmostEqual(cer.wer(['ถนนพหลโยธินแขวงลาดยาว'], ['ถนนพหลโยธินเขตลาดยาว'], 'thai'), 1 / 5)
+        self.assertAlmostEqual(cer.token_error_rate(['น้ำ'], ['นำ'], 'grapheme'), 1.0)
+        errors, reference_tokens = cer.row_token_errors(hypotheses, references)
+        self.assertEqual(errors.tolist(), [1, 1, 1, 1])
+        self.assertEqual(reference_tokens.tolist(), [6, 2, 4, 0])
+
+    def test_column_token_counts(self):
+        predictions = pd.DataFrame({'a': ['The cat', 'hello'], 'b': ['a b', 'c']})
+        groundtruth = pd.DataFrame({'a': ['the cat sat', 'hello'], 'b': ['a c', 'c']})
+        counts = cer.column_edit_counts(predictions, groundtruth, ['a', 'b'], tokenizer='whitespace')
+        self.assertEqual(counts['token_errors'].tolist(), [1, 0, 1, 0])
+        summary = cer.summarize_edit_counts(counts)
+        self.assertAlmostEqual(summary.loc['a', 'wer'], 1 / 4)
+        self.assertAlmostEqual(summary.loc['b', 'wer'], 1 / 3)
+        self.assertAlmostEqual(cer.wer_from_counts(counts), 2 / 7)
+        self.assertNotIn('wer', cer.summarize_edit_counts(cer.column_edit_counts(predictions, groundtruth, ['a'])).columns)
+
+    def test_evaluate_systems(self):
+        references = pd.DataFrame({'id': [1, 2, 3], 'a': ['hello', 'world', 'ถนน'], 'b': ['abc', 'abd', '']})
+        systems = {
+            'good': pd.DataFrame({'id': [3, 2, 1], 'a': ['ถนน', 'world', 'Helo'], 'b': ['x', 'abd', 'abc']}),
+            'bad': pd.DataFrame({'id': [1, 2, 4], 'a': ['help', 'word', 'ถนน'], 'b': ['abd', 'xyz', 'abc']}),
+        }
+        leaderboard = cer.evaluate_systems(systems, references, ['a', 'b'], key_column='id')
+        self.assertEqual(leaderboard.index.tolist(), ['good', 'bad'])
+        self.assertEqual(leaderboard.loc['good', 'a'], cer.cer(['ถนน', 'world', 'helo'], ['ถนน', 'world', 'hello']))
+        # The empty reference is ignored
+        self.assertEqual(leaderboard.loc['good', 'b'], 0)
+        self.assertEqual(leaderboard.loc['bad', 'overall'], cer.cer(['help', 'word', 'abd', 'xyz'], ['hello', 'world', 'abc', 'abd']))
+        self.assertEqual(leaderboard.loc['bad', 'rows'], 2)
+        self.assertEqual(leaderboard.loc['bad', 'unmatched_references'], 1)
+        # Same leaderboard with the references in shared memory
+        parallel = cer.evaluate_systems(systems, references, ['a', 'b'], key_column='id', workers=2, chunk_size=2)
+        pd.testing.assert_frame_equal(parallel, leaderboard)
+
+class TestCerCalculation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.predictions = os.path.join(self.directory.name, 'predictions.csv')
+        self.groundtruth = os.path.join(self.directory.name, 'groundtruth.csv')
+        pd.DataFrame({'id': [1, 2, 3], 'text': ['hello', 'helo', 'abc']}).to_csv(self.predictions, index=False)
+        pd.DataFrame({'id': [3, 1, 2], 'text': ['abd', 'hello', 'hello']}).to_csv(self.groundtruth, index=False)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_script(self, *options):
+        command = [sys.executable, SCRIPT, '--predictions', self.predictions, '--groundtruth', self.groundtruth, '--prediction_column', 'text', '--groundtruth_column', 'text', *options]
+        return subprocess.run(command, capture_output=True, text=True, cwd=self.directory.name)
+
+    def test_state_file_options(self):
+        state_file = os.path.join(self.directory.name, 'state.pkl')
+        for options in [['--workers', '2'], ['--cache_dir', self.directory.name]]:
+            with self.subTest(options=options):
+                result = self.run_script('--id_column', 'id', '--state_file', state_file, *options)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn('--state_file', result.stderr)
+        result = self.run_script('--id_column', 'id', '--state_file', state_file)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn(f'CER: {cer.cer(["hello", "helo", "abc"], ["hello", "hello", "abd"])}', result.stdout)
+
+    def test_empty_predictions(self):
+        # An empty cell is read as a missing value and scored as an empty prediction
+        pd.DataFrame({'id': [1, 2, 3], 'text': ['hello', None, 'abc']}).to_csv(self.predictions, index=False)
+        pd.DataFrame({'id': [1, 2, 3], 'text': ['hello', 'world', 'abd']}).to_csv(self.groundtruth, index=False)
+        expected = cer.cer(['hello', '', 'abc'], ['hello', 'world', 'abd'])
+        for options in [[], ['--no_streaming'], ['--id_column', 'id']]:
+            with self.subTest(options=options):
+                result = self.run_script(*options)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertIn(f'CER: {expected}', result.stdout)
@@ -0,0 +1,51 @@
+##############################################################################
+# A unittest for confusion.py
+##############################################################################
+
+import os
+import tempfile
+import unittest
+from collections import Counter
+import pandas as pd
+from cer_tools import cer, confusion
+
+class TestConfusion(unittest.TestCase):
+
+    def setUp(self):
+        # ด read as ต, a dropped tone mark and an inserted character
+        self.confusions = Counter({('ด', 'ต'): 3, ('\u0e49', ''): 2, ('', 'x'): 1})
+
+    def test_confusion_table(self):
+        table = confusion.confusion_table(self.confusions)
+        self.assertEqual(list(table.columns), confusion.CONFUSION_COLUMNS)
+        self.assertEqual(table['operation'].tolist(), ['substitution', 'deletion', 'insertion'])
+        self.assertEqual(table['count'].tolist(), [3, 2, 1])
+        top = confusion.top_confusions(self.confusions, top=2)
+        self.assertEqual(top['share'].tolist(), [0.5, 2 / 6])
+
+    def test_write_confusions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'confusions.csv')
+            confusion.write_confusions(self.confusions, file_path)
+            table = pd.read_csv(file_path, keep_default_na=False)
+            self.assertEqual(table['count'].tolist(), [3, 2, 1])
+            self.assertEqual(table['hypothesis'].tolist(), ['ต', '', 'x'])
+            with self.assertRaises(ValueError):
+                confusion.write_confusions(self.confusions, os.path.join(directory, 'confusions.txt'))
+
+    def test_describe_character(self):
+        self.assertEqual(confusion.describe_character(''), '\u2205')
+        self.assertEqual(confusion.describe_character('\u0e49'), '\u25cc\u0e49')
+        self.assertEqual(confusion.describe_character('ด'), 'ด')
+
+    def test_alignment_counts(self):
+        hypotheses = ['ตาก', 'บาน', 'abc', 'x'] * 1000
+        references = ['ดาก', 'บ้าน', 'ab', ''] * 1000
+        counts, confusions = cer.alignment_counts(hypotheses, references)
+        self.assertEqual(cer.cer_from_counts(counts), cer.cer(hypotheses, references))
+        # The pairs with an empty reference are not counted
+        self.assertEqual(confusions, Counter({('ด', 'ต'): 1000, ('\u0e49', ''): 1000, ('', 'c'): 1000}))
+        # The counters of the workers are merged into the same counts
+        parallel_counts, parallel_confusions = cer.alignment_counts(hypotheses, references, workers=2, chunk_size=1000)
+        pd.testing.assert_frame_equal(parallel_counts, counts)
+        self.assertEqual(parallel_confusions, confusions)
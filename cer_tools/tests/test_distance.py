@@ -0,0 +1,85 @@
+##############################################################################
+# A unittest for distance.py and the distance backends of cer.py
+##############################################################################
+
+import random
+import unittest
+import jiwer
+from cer_tools import cer, distance
+
+THAI_REFERENCES = ['เลขที่ 64 หมู่ 14 ถนนพหลโยธิน ตำบลปากน้ำโพ อำเภอเมือง จังหวัดนครสวรรค์ 60000', 'เลขที่ 62 หมู่ 12 ถนนพหลโยธิน ตำบลเวียง อำเภอเมือง จังหวัดเชียงราย 57000']
+THAI_HYPOTHESES = ['เลขที่ 84 หมู่ 14 ถนนพหลโยธิน ตำบลปากน้ำโพ อำเภอเมือง จังหวัดนครสวรรค์ 60000', 'เลขที 62 หมู่ 12 ถนนพหลโยธน ตำบลเวียง อําเภอเมือง จงหวัดเชียงราย 5700']
+ALPHABET = 'abcdeกขคดตบปเแ่้๊๋ํา '
+
+def jiwer_operations(hypothesis: str, reference: str):
+    output = jiwer.process_characters(reference=reference.strip(), hypothesis=hypothesis.strip())
+    return [output.substitutions, output.deletions, output.insertions]
+
+def jiwer_errors(hypothesis: str, reference: str) -> int:
+    return sum(jiwer_operations(hypothesis, reference))
+
+def random_pairs(count: int, max_length: int):
+    rng = random.Random(count)
+    pairs = []
+    for _ in range(count):
+        reference = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, max_length)))
+        hypothesis = list(reference)
+        # Apply a few random edits so that pairs range from identical to unrelated
+        for _ in range(rng.randint(0, len(reference))):
+            position = rng.randint(0, len(hypothesis))
+            operation = rng.choice(['insert', 'delete', 'replace'])
+            if operation == 'insert' or not hypothesis:
+                hypothesis.insert(position, rng.choice(ALPHABET))
+            elif operation == 'delete':
+                del hypothesis[min(position, len(hypothesis) - 1)]
+            else:
+                hypothesis[min(position, len(hypothesis) - 1)] = rng.choice(ALPHABET)
+        # jiwer strips the strings before scoring them
+        pairs.append((''.join(hypothesis).strip(), reference.strip() or 'a'))
+    return pairs
+
+class TestDistance(unittest.TestCase):
+
+    def test_levenshtein(self):
+        self.assertEqual(distance.levenshtein('', ''), 0)
+        self.assertEqual(distance.levenshtein('abc', ''), 3)
+        self.assertEqual(distance.levenshtein('', 'abc'), 3)
+        self.assertEqual(distance.levenshtein('kitten', 'sitting'), 3)
+        for hypothesis, reference in zip(THAI_HYPOTHESES, THAI_REFERENCES):
+            self.assertEqual(distance.levenshtein(hypothesis, reference), jiwer_errors(hypothesis, reference))
+
+    def test_levenshtein_random(self):
+        # Lengths above 64 span several machine words in the bit-parallel algorithm of rapidfuzz
+        for max_length in [10, 64, 200]:
+            pairs = random_pairs(300, max_length)
+            hypotheses = [hyp for hyp, _ in pairs]
+            references = [ref for _, ref in pairs]
+            expected = [jiwer_errors(hyp, ref) for hyp, ref in pairs]
+            self.assertEqual([distance.levenshtein(hyp, ref) for hyp, ref in pairs], expected)
+            self.assertEqual(distance.levenshtein_batch(hypotheses, references).tolist(), expected)
+
+    def test_max_distance(self):
+        pairs = random_pairs(300, 120)
+        hypotheses = [hyp for hyp, _ in pairs]
+        references = [ref for _, ref in pairs]
+        expected = [jiwer_errors(hyp, ref) for hyp, ref in pairs]
+        for max_distance in [0, 1, 5, 30]:
+            capped = [min(errors, max_distance + 1) for errors in expected]
+            self.assertEqual([distance.levenshtein(hyp, ref, max_distance) for hyp, ref in pairs], capped)
+            self.assertEqual(distance.levenshtein_batch(hypotheses, references, max_distance).tolist(), capped)
+
+    def test_edit_operations_batch(self):
+        pairs = random_pairs(300, 100) + [('', 'abc'), ('abc', 'abc')]
+        hypotheses = [hyp for hyp, _ in pairs] + THAI_HYPOTHESES
+        references = [ref for _, ref in pairs] + THAI_REFERENCES
+        expected = [jiwer_operations(hyp, ref) for hyp, ref in zip(hypotheses, references)]
+        self.assertEqual(distance.edit_operations_batch(hypotheses, references).tolist(), expected)
+
+    def test_backends(self):
+        pairs = random_pairs(500, 80)
+        hypotheses = [hyp for hyp, _ in pairs] + THAI_HYPOTHESES
+        references = [ref for _, ref in pairs] + THAI_REFERENCES
+        self.assertEqual(cer.edit_counts(hypotheses, references, 'native'), cer.edit_counts(hypotheses, references, 'jiwer'))
+        self.assertEqual(cer.cer(hypotheses, references, 'native'), cer.cer(hypotheses, references, 'jiwer'))
+        with self.assertRaises(ValueError):
+            cer.cer(hypotheses, references, 'unknown')
@@ -0,0 +1,41 @@
+##############################################################################
+# A unittest for incremental.py
+##############################################################################
+
+import os
+import tempfile
+import unittest
+from cer_tools import cer, incremental
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.directory.name, 'state.pkl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_incremental_cer(self):
+        keys = [1, 2, 3, 4]
+        hypotheses = ['helo', 'world', 'ถนนพหลโยธน', 'abc']
+        references = ['hello', 'word', 'ถนนพหลโยธิน', 'abd']
+        cer_score, report = incremental.incremental_cer(keys, hypotheses, references, self.state_path)
+        self.assertEqual(cer_score, cer.cer(hypotheses, references))
+        self.assertEqual(report, incremental.IncrementalReport(added=4, changed=0, removed=0, unchanged=0))
+
+        # Fix a groundtruth row, change a prediction, remove a row and append one
+        keys = [1, 2, 3, 5]
+        hypotheses = ['helo', 'world', 'ถนนพหลโยธิน', 'xyz']
+        references = ['helo', 'word', 'ถนนพหลโยธิน', 'xy']
+        cer_score, report = incremental.incremental_cer(keys, hypotheses, references, self.state_path)
+        self.assertEqual(cer_score, cer.cer(hypotheses, references))
+        self.assertEqual(report, incremental.IncrementalReport(added=1, changed=2, removed=1, unchanged=1))
+
+        cer_score, report = incremental.incremental_cer(keys, hypotheses, references, self.state_path)
+        self.assertEqual(cer_score, cer.cer(hypotheses, references))
+        self.assertEqual(report, incremental.IncrementalReport(added=0, changed=0, removed=0, unchanged=4))
+
+    def test_duplicate_keys(self):
+        with self.assertRaises(ValueError):
+            incremental.incremental_cer([1, 1], ['a', 'b'], ['a', 'b'], self.state_path)
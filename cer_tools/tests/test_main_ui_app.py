@@ -0,0 +1,76 @@
+##############################################################################
+# A unittest for the scoring logic and the table model of main_ui_app.py
+##############################################################################
+
+import os
+import unittest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+from cer_tools import cer
+from cer_tools.main_ui_app import DataFrameModel, Task, TaskCancelled, compute_edit_counts, row_cer_by_key
+
+class TestMainUiApp(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_compute_edit_counts(self):
+        predictions = pd.DataFrame({'id': [3, 1, 2, 5], 'a': ['c', 'helo', 'World ', 'e'], 'b': ['x', 'abc', 'ถนน', 'y']})
+        groundtruth = pd.DataFrame({'id': [1, 2, 3], 'a': ['hello', 'word', 'c'], 'b': ['abd', 'ถนน', '']})
+        task = Task(compute_edit_counts)
+        partial = []
+        task.signals.partial.connect(partial.append)
+        counts, confusions, report, keys = compute_edit_counts(task, predictions, groundtruth)
+        self.assertEqual(keys.tolist(), [3, 1, 2])
+        self.assertEqual(report.unmatched_hypotheses, [5])
+        aligned_predictions, aligned_groundtruth, _ = cer.join_on_key(predictions, groundtruth)
+        expected = cer.column_edit_counts(aligned_predictions, aligned_groundtruth, sorted(counts['column'].unique()))
+        self.assertEqual(cer.cer_from_counts(counts), cer.cer_from_counts(expected))
+        self.assertEqual(confusions[('l', '')], 1)
+        # The CER of every column is sent as soon as it is computed, without WER when no tokenizer is given
+        self.assertEqual(sorted(column for column, _, _ in partial), ['a', 'b'])
+        self.assertTrue(all(wer is None for _, _, wer in partial))
+        with self.assertRaises(ValueError):
+            compute_edit_counts(task, predictions, groundtruth.assign(id=[7, 8, 9]))
+        with self.assertRaises(ValueError):
+            compute_edit_counts(task, predictions[['id', 'a']], groundtruth[['id', 'b']])
+        task.cancel()
+        with self.assertRaises(TaskCancelled):
+            compute_edit_counts(task, predictions, groundtruth)
+
+    def test_row_cer_by_key(self):
+        predictions = pd.DataFrame({'id': ['x', 'y', 'z'], 'a': ['helo', 'abc', 'q'], 'b': ['ab', 'abc', 'r']})
+        groundtruth = pd.DataFrame({'id': ['x', 'y', 'z'], 'a': ['hello', 'abc', ''], 'b': ['abc', 'abc', '']})
+        counts = cer.column_edit_counts(predictions, groundtruth, ['a', 'b'])
+        row_cer = row_cer_by_key(counts, predictions['id'])
+        # Summed over both columns: 2 errors over 8 reference characters
+        self.assertAlmostEqual(row_cer['x'], 2 / 8)
+        self.assertEqual(row_cer['y'], 0)
+        # All the references of the row are empty
+        self.assertTrue(np.isnan(row_cer['z']))
+
+    def test_data_frame_model(self):
+        data = pd.DataFrame({'id': [2, 1, 3], 'text': ['b', None, 'a']})
+        model = DataFrameModel(data)
+        self.assertEqual((model.rowCount(), model.columnCount()), (3, 2))
+        self.assertEqual(model.headerData(1, Qt.Orientation.Horizontal), 'text')
+        # Missing values are shown empty
+        self.assertEqual(model.data(model.index(1, 1)), '')
+        model.sort(1, Qt.SortOrder.AscendingOrder)
+        self.assertEqual([model.data(model.index(row, 1)) for row in range(3)], ['a', 'b', ''])
+        # The row headers keep the position of the rows in the file
+        self.assertEqual(model.headerData(0, Qt.Orientation.Vertical), '3')
+        model.sort(0, Qt.SortOrder.DescendingOrder)
+        self.assertEqual([model.data(model.index(row, 0)) for row in range(3)], ['3', '2', '1'])
+        model.sort(-1)
+        self.assertEqual(model.data(model.index(0, 0)), '2')
+        # Only the rows with errors are highlighted, the tooltip gives their CER
+        model.set_row_cer(np.array([0.0, np.nan, 0.5]))
+        self.assertIsNone(model.data(model.index(0, 0), Qt.ItemDataRole.BackgroundRole))
+        self.assertIsNone(model.data(model.index(1, 0), Qt.ItemDataRole.BackgroundRole))
+        self.assertIsNotNone(model.data(model.index(2, 0), Qt.ItemDataRole.BackgroundRole))
+        self.assertEqual(model.data(model.index(2, 0), Qt.ItemDataRole.ToolTipRole), 'Row CER: 50.00%')
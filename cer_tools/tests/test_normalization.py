@@ -0,0 +1,41 @@
+##############################################################################
+# A unittest for normalization.py
+##############################################################################
+
+import unittest
+import numpy as np
+import pandas as pd
+from cer_tools import cer, normalization
+
+class TestNormalization(unittest.TestCase):
+
+    def test_default_steps(self):
+        values = [' Hello ', 'WORLD', 12, 'เลขที่ 64 ']
+        self.assertEqual(normalization.normalize(values), [cer.process_text(value) for value in values])
+        self.assertEqual(normalization.normalize(pd.Series(values)), ['hello', 'world', '12', 'เลขที่ 64'])
+
+    @unittest.skipIf(normalization.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_lowercase(self):
+        # Arrow lowercases every character on its own, str.lower() handles the final sigma and the dotted capital I
+        values = ['\u03a3\u0391\u03a3', '\u0130stanbul']
+        self.assertEqual(normalization.normalize(values), ['\u03c3\u03b1\u03c3', 'istanbul'])
+        self.assertEqual([cer.process_text(value) for value in values], ['\u03c3\u03b1\u03c2', 'i\u0307stanbul'])
+
+    def test_missing_values(self):
+        self.assertEqual(normalization.normalize(['a', np.nan, None]), ['a', '', ''])
+
+    def test_steps(self):
+        self.assertEqual(normalization.normalize([' a \t b  c '], ['collapse_whitespace', 'strip']), ['a b c'])
+        self.assertEqual(normalization.normalize(['ab\u200bc\ufeff'], ['remove_zero_width']), ['abc'])
+        # Decomposed and composed forms compare equal after NFC
+        self.assertEqual(normalization.normalize(['e\u0301'], ['nfc']), ['\u00e9'])
+
+    def test_thai(self):
+        # Decomposed sara am, with the tone mark on either side of the nikhahit
+        self.assertEqual(normalization.normalize(['อําเภอ', 'น้ํา', 'นํ้า'], ['thai']), ['อำเภอ', 'น้ำ', 'น้ำ'])
+        # Tone mark typed before the vowel above the consonant
+        self.assertEqual(normalization.normalize(['ก่ิน'], ['thai']), ['กิ่น'])
+
+    def test_unknown_step(self):
+        with self.assertRaises(ValueError):
+            normalization.normalize(['a'], ['unknown'])
@@ -0,0 +1,73 @@
+##############################################################################
+# A unittest for readers.py
+##############################################################################
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from cer_tools import readers
+
+DATAFRAME = pd.DataFrame({'id': [1, 2, 3], 'predictions': ['helo', None, 'ถนน'], 'groundtruths': ['hello', 'world', 'ถนน']})
+
+class TestReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, extension: str) -> str:
+        file_path = os.path.join(self.directory.name, 'data' + extension)
+        if extension in ('.csv', '.csv.gz'):
+            DATAFRAME.to_csv(file_path, index=False)
+        elif extension in ('.jsonl', '.jsonl.gz'):
+            DATAFRAME.to_json(file_path, orient='records', lines=True, force_ascii=False)
+        elif extension == '.parquet':
+            DATAFRAME.to_parquet(file_path)
+        else:
+            DATAFRAME.to_feather(file_path)
+        return file_path
+
+    def check_format(self, extension: str):
+        file_path = self.write(extension)
+        dataframe = readers.read_file(file_path)
+        self.assertEqual(dataframe['groundtruths'].tolist(), DATAFRAME['groundtruths'].tolist())
+        # Column projection
+        dataframe = readers.read_file(file_path, ['id', 'predictions'], as_text=True)
+        self.assertEqual(list(dataframe.columns), ['id', 'predictions'])
+        self.assertEqual(dataframe['id'].tolist(), ['1', '2', '3'])
+        self.assertTrue(pd.isna(dataframe['predictions'][1]))
+        chunks = list(readers.read_column_chunks(file_path, 'groundtruths', chunk_size=2))
+        self.assertEqual(chunks, [['hello', 'world'], ['ถนน']])
+        head = readers.read_head(file_path, rows=2)
+        self.assertEqual(head['id'].tolist(), ['1', '2'])
+        self.assertEqual(head['groundtruths'].tolist(), ['hello', 'world'])
+
+    def test_text_formats(self):
+        for extension in ['.csv', '.csv.gz', '.jsonl', '.jsonl.gz']:
+            with self.subTest(extension=extension):
+                self.check_format(extension)
+
+    @unittest.skipIf(readers.pyarrow is None, "pyarrow is not installed")
+    def test_arrow_formats(self):
+        for extension in ['.parquet', '.arrow', '.feather']:
+            with self.subTest(extension=extension):
+                self.check_format(extension)
+
+    def test_csv_as_text(self):
+        # Numeric-looking text is kept as written, the same as in the streamed chunks
+        file_path = os.path.join(self.directory.name, 'data.csv')
+        with open(file_path, 'w') as file:
+            file.write('id,text\n1,007\n2,12\n3,\n')
+        dataframe = readers.read_file(file_path, as_text=True)
+        self.assertEqual(dataframe['text'].tolist()[:2], ['007', '12'])
+        self.assertTrue(pd.isna(dataframe['text'][2]))
+        self.assertEqual(readers.read_file(file_path, ['text'], as_text=True)['text'].tolist()[:2], next(readers.read_column_chunks(file_path, 'text'))[:2])
+
+    def test_file_format(self):
+        self.assertEqual(readers.file_format('data.CSV.gz'), '.csv.gz')
+        self.assertEqual(readers.file_format('data.xlsx'), '.xlsx')
+        with self.assertRaises(ValueError):
+            readers.file_format('data.txt')
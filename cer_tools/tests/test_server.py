@@ -0,0 +1,106 @@
+##############################################################################
+# A unittest for server.py and client.py
+##############################################################################
+
+import asyncio
+import http.client
+import subprocess
+import sys
+import threading
+import unittest
+from cer_tools import cer
+from cer_tools.client import ScoringClient, ScoringError
+from cer_tools.server import ScoringServer
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The server runs on its own event loop in a background thread, port 0 picks a free port
+        cls.server = ScoringServer(port=0, max_delay=0.05)
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(cls.server.start(), cls.loop).result()
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.server.stop(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    def setUp(self):
+        self.client = ScoringClient(port=self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_cer(self):
+        hypotheses = ['helo world', 'ถนนพหลโยธน', ' x', 'abc']
+        references = ['hello world', 'ถนนพหลโยธิน', '', 'abd ']
+        self.assertTrue(self.client.health())
+        self.assertAlmostEqual(self.client.cer(hypotheses, references), cer.cer(hypotheses, references))
+        # The pair with an empty reference is ignored
+        errors, reference_length = cer.row_errors(hypotheses, references)
+        self.assertEqual(self.client.errors(hypotheses, references), (int(errors[reference_length > 0].sum()), int(reference_length.sum())))
+        self.assertEqual(self.client.cer([], []), 1.0)
+        with self.assertRaises(ScoringError):
+            self.client.cer(['a'], [])
+
+    def test_score_many(self):
+        results = list(self.client.score_many([('a', ['helo'], ['hello']), ('b', ['x'], [1]), ('c', [], [])]))
+        self.assertEqual([result['id'] for result in results], ['a', 'b', 'c'])
+        self.assertEqual((results[0]['errors'], results[0]['reference_length']), (1, 5))
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['cer'], 1.0)
+        # A stream that is not read to the end does not break the next request
+        next(self.client.score_many([('a', ['helo'], ['hello']), ('b', ['a'], ['b'])]))
+        self.assertAlmostEqual(self.client.cer(['helo'], ['hello']), 0.2)
+
+    def test_micro_batching(self):
+        hypotheses = [f'line {index} helo' for index in range(400)]
+        references = [f'line {index} hello' for index in range(400)]
+        results = {}
+        def score(index):
+            with ScoringClient(port=self.server.port) as client:
+                results[index] = client.cer(hypotheses[index::20], references[index::20])
+        batches = self.client.metrics()['batches']
+        threads = [threading.Thread(target=score, args=(index,)) for index in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index in range(20):
+            self.assertAlmostEqual(results[index], cer.cer(hypotheses[index::20], references[index::20]))
+        # The concurrent requests are scored in fewer batches than requests
+        metrics = self.client.metrics()
+        self.assertLess(metrics['batches'] - batches, 20)
+        self.assertGreater(metrics['latency_ms']['p50'], 0)
+        self.assertGreater(metrics['scoring_pairs_per_second'], 0)
+
+    def test_workers(self):
+        server = ScoringServer(port=0, workers=2)
+        asyncio.run_coroutine_threadsafe(server.start(), self.loop).result()
+        try:
+            hypotheses = ['helo', 'world', 'ถนนพหลโยธน'] * 1000
+            references = ['hello', 'word', 'ถนนพหลโยธิน'] * 1000
+            with ScoringClient(port=server.port) as client:
+                self.assertAlmostEqual(client.cer(hypotheses, references), cer.cer(hypotheses, references))
+                # Every batch is scored by the worker processes started with the server
+                pool = cer.worker_pool(2)
+                self.assertAlmostEqual(client.cer(hypotheses, references), cer.cer(hypotheses, references))
+                self.assertIs(cer.worker_pool(2), pool)
+        finally:
+            asyncio.run_coroutine_threadsafe(server.stop(), self.loop).result()
+
+    def test_unknown_path(self):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.port)
+        connection.request('GET', '/unknown')
+        self.assertEqual(connection.getresponse().status, 404)
+        connection.close()
+
+    def test_client_without_pandas(self):
+        code = 'import sys, cer_tools.client; print("pandas" in sys.modules, "numpy" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
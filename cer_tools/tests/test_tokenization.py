@@ -0,0 +1,34 @@
+##############################################################################
+# A unittest for tokenization.py
+##############################################################################
+
+import unittest
+from cer_tools import tokenization
+
+class TestTokenization(unittest.TestCase):
+
+    def test_whitespace(self):
+        self.assertEqual(tokenization.tokenize(['  the cat\tsat ', ''], 'whitespace'), [('the', 'cat', 'sat'), ()])
+
+    def test_grapheme(self):
+        # น้ำ is one cluster: the tone mark and sara am belong to the consonant
+        self.assertEqual(tokenization.grapheme_clusters('น้ำáb'), ['น้ำ', 'á', 'b'])
+
+    def test_thai(self):
+        self.assertEqual(tokenization.tokenize(['ถนนพหลโยธินเขตลาดยาว 10900'], 'thai'), [('ถนน', 'พหลโยธิน', 'เขต', 'ลาด', 'ยาว', '10900')])
+        # Characters outside the word list are kept together rather than split into single characters
+        self.assertEqual(tokenization.segment_thai('ถนนกขคง', frozenset(['ถนน'])), ['ถนน', 'กขคง'])
+        self.assertEqual(tokenization.segment_thai(''), [])
+
+    def test_get_tokenizer(self):
+        self.assertIs(tokenization.get_tokenizer(str.split), str.split)
+        with self.assertRaises(ValueError):
+            tokenization.get_tokenizer('unknown')
+
+    def test_tokenize_once_per_string(self):
+        self.assertEqual(tokenization.tokenize(['a b', 'c', 'a b'], str.split), [('a', 'b'), ('c',), ('a', 'b')])
+        # The built-in tokenizers are cached per string
+        hits = tokenization._whitespace.cache_info().hits
+        tokens = tokenization.tokenize(['x y z', 'x y z'], 'whitespace')
+        self.assertEqual(tokens, [('x', 'y', 'z')] * 2)
+        self.assertEqual(tokenization._whitespace.cache_info().hits, hits + 1)
@@ -0,0 +1,155 @@
+####################################################################################################
+# Description: Tokenizers used by the word and token error rates (`cer.wer()`, `cer.token_error_rate()`).
+# - whitespace: words separated by whitespace, as in jiwer's WER
+# - thai: Thai text written without spaces is segmented by dictionary-based maximal matching with a
+#   built-in word list, other scripts are split on whitespace
+# - grapheme: user-perceived characters, a base character with its combining marks (e.g. Thai tone marks)
+# A tokenizer is any function from a string to a list of tokens, the built-in ones are cached per string.
+####################################################################################################
+
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple, Union
+import re
+import unicodedata
+
+# Number of distinct strings whose tokens are kept by each built-in tokenizer
+CACHE_SIZE = 1 << 18
+
+# Common Thai words, including the words of addresses, receipts and identity documents found in OCR datasets
+THAI_WORDS: FrozenSet[str] = frozenset('''
+ที่ ของ และ ใน การ เป็น มี ได้ ไม่ ให้ จะ ว่า กับ แต่ หรือ จาก ไป มา อยู่ คน นี้ นั้น ก็ ความ แล้ว ด้วย ถึง เพื่อ โดย ซึ่ง
+อย่าง เมื่อ ยัง ต้อง หนึ่ง สอง สาม สี่ ห้า หก เจ็ด แปด เก้า สิบ ร้อย พัน หมื่น แสน ล้าน บาท สตางค์ วัน เดือน ปี เวลา
+ชั่วโมง นาที บ้าน เมือง ประเทศ ไทย ภาษา คำ ชื่อ นามสกุล นาย นาง นางสาว เด็ก ผู้ ผู้ชาย ผู้หญิง พ่อ แม่ ลูก พี่ น้อง เพื่อน
+ครู นักเรียน โรงเรียน มหาวิทยาลัย โรงพยาบาล หมอ ตำรวจ ทหาร รัฐบาล บริษัท จำกัด มหาชน ธนาคาร สาขา ถนน ซอย หมู่
+หมู่บ้าน ตำบล แขวง อำเภอ เขต จังหวัด กรุงเทพ กรุงเทพมหานคร รหัส ไปรษณีย์ โทร โทรศัพท์ เลขที่ เลข หมายเลข ที่อยู่
+วันที่ ราคา จำนวน รวม ทั้งหมด ภาษี มูลค่า เพิ่ม ใบ ใบเสร็จ ใบกำกับ รับเงิน สินค้า บริการ รายการ ลำดับ หน่วย ชิ้น กล่อง
+ขวด ลูกค้า ผู้ขาย ผู้ซื้อ ลงชื่อ ลายมือ เอกสาร หนังสือ สัญญา บัตร ประชาชน เกิด อายุ เพศ ชาย หญิง สัญชาติ ศาสนา พุทธ
+อาชีพ งาน ทำ กิน ดื่ม นอน เดิน วิ่ง พูด อ่าน เขียน ดู ฟัง รู้ เห็น คิด ชอบ รัก อยาก ขอ ซื้อ ขาย ใช้ ส่ง รับ เปิด ปิด เริ่ม
+จบ ดี ใหม่ เก่า ใหญ่ เล็ก มาก น้อย สูง ต่ำ ยาว สั้น ร้อน เย็น น้ำ ไฟ ฟ้า ดิน ลม ข้าว อาหาร ผลไม้ ผัก ปลา ไก่ หมู เนื้อ ไข่
+นม กาแฟ ชา รถ รถยนต์ รถไฟ เรือ เครื่องบิน ทาง ซ้าย ขวา หน้า หลัง บน ล่าง ใต้ เหนือ ตะวันออก ตะวันตก กลาง ใกล้ ไกล
+ข้าง ระหว่าง ภายใน ภายนอก ตาม ต่อ แบบ เรื่อง ข้อ ส่วน ระบบ ข้อมูล ผล ตรวจ สอบ คะแนน ถูก ผิด ต้น ปลาย ทุก บาง
+หลาย อื่น เอง กัน ตัว เขา เธอ ฉัน ผม ดิฉัน เรา คุณ ท่าน พวก อะไร ใคร ที่ไหน เมื่อไร ทำไม อย่างไร เท่าไร ครับ ค่ะ คะ นะ
+สวัสดี ขอบคุณ ขอโทษ พระ วัด ตลาด ร้าน ห้อง ประตู หน้าต่าง โต๊ะ เก้าอี้ เตียง พหลโยธิน สุขุมวิท เพชรบุรี รามคำแหง
+ลาด ลาดพร้าว วิภาวดี รังสิต นนทบุรี ปทุมธานี สมุทรปราการ เชียงใหม่ ภูเก็ต ขอนแก่น
+'''.split())
+
+# Characters that belong to the cluster of the character before them although they are not combining marks
+CLUSTER_EXTENDERS = frozenset('\u0e33\u0eb3\u200d\ufe0e\ufe0f')  # Thai and Lao sara am, zero-width joiner, variation selectors
+THAI_OR_OTHER_RUNS = re.compile('[\u0e00-\u0e7f]+|[^\u0e00-\u0e7f\\s]+')
+
+def grapheme_clusters(text: str) -> List[str]:
+    """
+    Split a text into user-perceived characters, an approximation of the Unicode extended grapheme clusters
+    Args:
+        text: string
+    Returns:
+        clusters: list of strings, each a base character followed by its combining marks
+    """
+    clusters = []
+    for character in text:
+        attached = character in CLUSTER_EXTENDERS or unicodedata.category(character) in ('Mn', 'Mc', 'Me')
+        if clusters and (attached or clusters[-1].endswith('\u200d')):
+            clusters[-1] += character
+        else:
+            clusters.append(character)
+    return clusters
+
+def segment_thai(text: str, words: FrozenSet[str] = THAI_WORDS) -> List[str]:
+    """
+    Segment a run of Thai characters into the fewest dictionary words, maximal matching
+    Splits are only made between grapheme clusters. The characters not covered by any word are kept as
+    few tokens as possible, each run of them being one token.
+    Args:
+        text: string without whitespace
+        words: set of known words
+    Returns:
+        tokens: list of strings
+    """
+    clusters = grapheme_clusters(text)
+    boundaries = [0]
+    for cluster in clusters:
+        boundaries.append(boundaries[-1] + len(cluster))
+    longest = max(map(len, words), default=1)
+    # best[i]: (characters not covered by a word, number of tokens, previous boundary, is a word) of the best segmentation of the first i clusters
+    best = [(0, 0, 0, True)] + [None] * len(clusters)
+    for start in range(len(clusters)):
+        unknown, tokens, _, _ = best[start]
+        # An unknown cluster
+        candidate = (unknown + len(clusters[start]), tokens + 1, start, False)
+        if best[start + 1] is None or candidate[:2] < best[start + 1][:2]:
+            best[start + 1] = candidate
+        for end in range(start + 1, len(clusters) + 1):
+            if boundaries[end] - boundaries[start] > longest:
+                break
+            if text[boundaries[start]:boundaries[end]] in words:
+                candidate = (unknown, tokens + 1, start, True)
+                if best[end] is None or candidate[:2] < best[end][:2]:
+                    best[end] = candidate
+    segments: List[Tuple[str, bool]] = []
+    end = len(clusters)
+    while end > 0:
+        _, _, start, is_word = best[end]
+        segments.append((text[boundaries[start]:boundaries[end]], is_word))
+        end = start
+    tokens = []
+    previous_is_word = True
+    for segment, is_word in reversed(segments):
+        # Consecutive unknown clusters form one token
+        if not is_word and not previous_is_word:
+            tokens[-1] += segment
+        else:
+            tokens.append(segment)
+        previous_is_word = is_word
+    return tokens
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _whitespace(text: str) -> Tuple[str, ...]:
+    return tuple(text.split())
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _thai(text: str) -> Tuple[str, ...]:
+    tokens = []
+    for run in THAI_OR_OTHER_RUNS.findall(text):
+        if '\u0e00' <= run[0] <= '\u0e7f':
+            tokens += segment_thai(run)
+        else:
+            tokens.append(run)
+    return tuple(tokens)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _grapheme(text: str) -> Tuple[str, ...]:
+    return tuple(grapheme_clusters(text))
+
+# Tokenizers by name, each takes a string and returns its tokens
+TOKENIZERS: Dict[str, Callable[[str], Iterable[str]]] = {
+    'whitespace': _whitespace,
+    'thai': _thai,
+    'grapheme': _grapheme,
+}
+DEFAULT_TOKENIZER = 'whitespace'
+
+def get_tokenizer(tokenizer: Union[str, Callable[[str], Iterable[str]]]) -> Callable[[str], Iterable[str]]:
+    """
+    Get a tokenizer by name, a function is returned as is
+    Args:
+        tokenizer: name in `TOKENIZERS` or function from a string to its tokens
+    Returns:
+        tokenizer: function
+    """
+    if callable(tokenizer):
+        return tokenizer
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer '{tokenizer}', available tokenizers are {', '.join(TOKENIZERS)}")
+    return TOKENIZERS[tokenizer]
+
+def tokenize(texts: Iterable[str], tokenizer: Union[str, Callable[[str], Iterable[str]]] = DEFAULT_TOKENIZER) -> List[Tuple[str, ...]]:
+    """
+    Tokenize many strings, the built-in tokenizers only tokenize each distinct string once
+    Args:
+        texts: list of strings
+        tokenizer: name in `TOKENIZERS` or function from a string to its tokens
+    Returns:
+        tokens: list of tuples of strings
+    """
+    function = get_tokenizer(tokenizer)
+    return [tuple(function(text)) for text in texts]